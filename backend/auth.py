@@ -0,0 +1,96 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from flask import current_app, g, jsonify, request
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# The old built-in default; deployments that never overrode it still carry it
+INSECURE_SECRET_KEYS = {"dev"}
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool is saturated and the wait budget ran out"""
+
+
+class PasswordHasher:
+    """Runs password hashing on a small dedicated pool.
+
+    hashlib's pbkdf2/scrypt release the GIL, so threads give real parallelism,
+    and the semaphore caps queued work so a login burst can't pile up behind
+    the pool while every other route waits for the same request threads.
+    """
+
+    def __init__(self, method: str, workers: int, max_pending: int, wait_timeout: float):
+        self.method = method
+        self.wait_timeout = wait_timeout
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            raise HashingBusy("Too many concurrent password operations")
+        try:
+            return self._pool.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return self._run(check_password_hash, password_hash, password)
+
+
+def init_auth(app):
+    # Anyone who knows the key can mint a token for any user id
+    secret_key = app.config.get("SECRET_KEY")
+    if not secret_key or secret_key in INSECURE_SECRET_KEYS:
+        raise RuntimeError("SECRET_KEY must be set to a random value before session tokens can be issued")
+    app.extensions["password_hasher"] = PasswordHasher(
+        method=app.config["PASSWORD_HASH_METHOD"],
+        workers=app.config["PASSWORD_HASH_WORKERS"],
+        max_pending=app.config["PASSWORD_HASH_MAX_PENDING"],
+        wait_timeout=app.config["PASSWORD_HASH_WAIT_TIMEOUT"],
+    )
+    app.extensions["token_serializer"] = URLSafeTimedSerializer(secret_key, salt="session-token")
+
+
+def normalize_email(email: str) -> str:
+    """Canonical form stored in Users.email; registration, login and import_users.py all use it"""
+    return (email or "").strip().lower()
+
+
+def hash_password(password: str) -> str:
+    return current_app.extensions["password_hasher"].hash(password)
+
+
+def verify_password(password_hash: str, password: str) -> bool:
+    return current_app.extensions["password_hasher"].verify(password_hash, password)
+
+
+def issue_token(user_id: int, email: str) -> str:
+    return current_app.extensions["token_serializer"].dumps({"id": user_id, "email": email})
+
+
+def verify_token(token: str):
+    """Return the token's user payload, or None if it is forged or expired; no DB access"""
+    try:
+        return current_app.extensions["token_serializer"].loads(
+            token, max_age=current_app.config["SESSION_TOKEN_TTL"]
+        )
+    except (SignatureExpired, BadSignature):
+        return None
+
+
+def token_required(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        header = request.headers.get("Authorization", "")
+        token = header[7:] if header.startswith("Bearer ") else None
+        user = verify_token(token) if token else None
+        if user is None:
+            return jsonify({'success': False, 'message': 'Invalid or expired token'}), 401
+        g.user = user
+        return view(*args, **kwargs)
+    return wrapper
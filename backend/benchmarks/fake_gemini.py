@@ -0,0 +1,64 @@
+"""Stand-in for google.generativeai's GenerativeModel with configurable latency.
+
+Loaded by the chatbot through GEMINI_MODEL_FACTORY=fake_gemini:FakeGenerativeModel.
+Timing comes from the environment so the benchmark runner can set it per run:
+
+    FAKE_GEMINI_LATENCY       seconds before the first token (default 0.8)
+    FAKE_GEMINI_JITTER        +/- fraction applied to every delay (default 0.2)
+    FAKE_GEMINI_CHUNKS        chunks per streamed reply (default 20)
+    FAKE_GEMINI_CHUNK_DELAY   seconds between streamed chunks (default 0.02)
+"""
+import asyncio
+import os
+import random
+
+WORDS = ("linen", "denim", "layer", "neutral", "tailored", "oversized", "texture", "palette",
+         "sneakers", "blazer", "accent", "silhouette", "monochrome", "vintage", "structured")
+
+
+class UsageMetadata:
+    def __init__(self, prompt_token_count: int, candidates_token_count: int):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+
+
+class Chunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeResponse:
+    def __init__(self, prompt: str, chunks: list, chunk_delay: float, jitter: float):
+        self._chunks = chunks
+        self._chunk_delay = chunk_delay
+        self._jitter = jitter
+        self.text = "".join(chunks)
+        self.usage_metadata = UsageMetadata(max(1, len(prompt) // 4), max(1, len(self.text) // 4))
+
+    async def __aiter__(self):
+        for index, chunk in enumerate(self._chunks):
+            if index:
+                await asyncio.sleep(jittered(self._chunk_delay, self._jitter))
+            yield Chunk(chunk)
+
+
+def jittered(seconds: float, jitter: float) -> float:
+    return max(0.0, seconds * random.uniform(1 - jitter, 1 + jitter))
+
+
+class FakeGenerativeModel:
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.latency = float(os.getenv("FAKE_GEMINI_LATENCY", "0.8"))
+        self.jitter = float(os.getenv("FAKE_GEMINI_JITTER", "0.2"))
+        self.chunks = int(os.getenv("FAKE_GEMINI_CHUNKS", "20"))
+        self.chunk_delay = float(os.getenv("FAKE_GEMINI_CHUNK_DELAY", "0.02"))
+
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        await asyncio.sleep(jittered(self.latency, self.jitter))
+        chunks = [" ".join(random.choices(WORDS, k=6)) + " " for _ in range(self.chunks)]
+        if stream:
+            return FakeResponse(prompt, chunks, self.chunk_delay, self.jitter)
+        # A unary call takes as long as the whole stream would have
+        await asyncio.sleep(jittered(self.chunk_delay * (self.chunks - 1), self.jitter))
+        return FakeResponse(prompt, chunks, 0.0, 0.0)
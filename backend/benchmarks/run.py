@@ -0,0 +1,474 @@
+"""Load-test the Python services against local stand-ins and save the results.
+
+Each selected service is started as its own process:
+- on a throwaway SQLite database instead of MySQL;
+- with the chatbot talking to fake_gemini instead of the Gemini API.
+
+The runner seeds data through the same paths production uses: import_users.py,
+init_db.py and the bulk endpoints. Closed-loop clients then drive a weighted
+traffic mix for a fixed duration. Throughput and p50/p95/p99 per endpoint are
+printed and written as JSON, keyed by git commit, so runs can be compared:
+
+    python run.py --services app,style,chatbot --duration 30 --concurrency 32
+    python run.py --services chatbot --gemini-latency 1.5 --gemini-chunks 40
+    python run.py --compare results/abc1234.json results/def5678.json
+
+Install requirements.txt here next to each service's own requirements.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+import httpx
+from PIL import Image
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCHMARKS_DIR)
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, "results")
+
+STYLE_NAMES = ["Casual", "Contemporary", "Minimalist", "Streetwear", "Professional", "Classic",
+               "Formal", "Business Casual", "Urban", "Athleisure", "Vintage", "Trendy", "Boho", "Preppy"]
+POPULAR_PROMPTS = ["What should I wear to a summer wedding?", "How do I style white sneakers?",
+                   "Which colors go with navy?", "What is smart casual?", "How to layer for autumn?"]
+
+
+# --- Measurement ---
+
+class Recorder:
+    """Latencies and outcomes per endpoint label; samples before `measure_from` are dropped"""
+
+    def __init__(self):
+        self.measure_from = float("inf")
+        self.latencies = {}
+        self.errors = {}
+        self.statuses = {}
+
+    def record(self, label: str, seconds: float, status):
+        if time.monotonic() < self.measure_from:
+            return
+        self.latencies.setdefault(label, []).append(seconds)
+        statuses = self.statuses.setdefault(label, {})
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+        if status == "error" or (status >= 400 and not label.endswith("(wrong password)")):
+            self.errors[label] = self.errors.get(label, 0) + 1
+
+    def summary(self, duration: float) -> dict:
+        return {
+            label: {
+                "requests": len(samples),
+                "throughput_rps": round(len(samples) / duration, 2),
+                "errors": self.errors.get(label, 0),
+                "statuses": self.statuses[label],
+                "mean_ms": round(1000 * sum(samples) / len(samples), 2),
+                "p50_ms": percentile(samples, 50),
+                "p95_ms": percentile(samples, 95),
+                "p99_ms": percentile(samples, 99),
+                "max_ms": round(1000 * max(samples), 2),
+            }
+            for label, samples in sorted(self.latencies.items())
+        }
+
+
+def percentile(samples: list, pct: float) -> float:
+    # Nearest-rank percentile, in milliseconds
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return round(1000 * ordered[rank], 2)
+
+
+async def timed(recorder: Recorder, label: str, request):
+    started = time.perf_counter()
+    try:
+        response = await request
+        status = response.status_code
+    except httpx.HTTPError:
+        status = "error"
+    recorder.record(label, time.perf_counter() - started, status)
+
+
+# --- Service processes ---
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ServiceProcess:
+    def __init__(self, name: str, command: list, cwd: str, env: dict, ready_path: str, log_dir: str):
+        self.name = name
+        self.port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.command = [part.format(port=self.port) for part in command]
+        self.cwd = cwd
+        self.env = env
+        self.ready_path = ready_path
+        self.log_path = os.path.join(log_dir, f"{name}.log")
+        self.process = None
+
+    def start(self):
+        self.log = open(self.log_path, "w")
+        self.process = subprocess.Popen(self.command, cwd=self.cwd, env=self.env, stdout=self.log, stderr=subprocess.STDOUT)
+
+    async def wait_ready(self, timeout: float = 60) -> float:
+        started = time.monotonic()
+        async with httpx.AsyncClient(base_url=self.base_url) as client:
+            while time.monotonic() - started < timeout:
+                if self.process.poll() is not None:
+                    raise RuntimeError(f"{self.name} exited during startup; see {self.log_path}")
+                try:
+                    if (await client.get(self.ready_path)).status_code == 200:
+                        return time.monotonic() - started
+                except httpx.HTTPError:
+                    pass
+                await asyncio.sleep(0.1)
+        raise RuntimeError(f"{self.name} not ready after {timeout}s; see {self.log_path}")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.log.close()
+
+
+def service_env(**overrides) -> dict:
+    env = dict(os.environ)
+    # config.py lives at the repo root; benchmarks/ holds fake_gemini
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPO_DIR, BENCHMARKS_DIR, env.get("PYTHONPATH")]))
+    env["REQUEST_LOG_ENABLED"] = "false"
+    env.update({key: str(value) for key, value in overrides.items()})
+    return env
+
+
+def run_setup(command: list, cwd: str, env: dict):
+    subprocess.run(command, cwd=cwd, env=env, check=True, stdout=subprocess.DEVNULL)
+
+
+# --- Scenarios ---
+
+def sample_images(count: int, seed: int) -> list:
+    """Distinct JPEGs of colored blocks, so uploads exercise both analysis and dedup"""
+    rng = random.Random(seed)
+    images = []
+    for _ in range(count):
+        image = Image.new("RGB", (640, 800))
+        for _ in range(6):
+            x, y = rng.randrange(0, 560), rng.randrange(0, 720)
+            color = tuple(rng.randrange(256) for _ in range(3))
+            image.paste(color, (x, y, x + rng.randrange(80, 400), y + rng.randrange(80, 400)))
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=85)
+        images.append(buffer.getvalue())
+    return images
+
+
+class AppScenario:
+    """Flask app: login and uploads"""
+
+    name = "app"
+    ready_path = "/metrics"
+
+    def __init__(self, args, workdir: str):
+        self.args = args
+        self.passwords = {f"bench{i}@example.com": f"password-{i}" for i in range(args.users)}
+        self.emails = list(self.passwords)
+        self.images = sample_images(args.images, args.seed)
+        self.env = service_env(
+            DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'app.db')}?timeout=30",
+            UPLOAD_FOLDER=os.path.join(workdir, "uploads"),
+            PASSWORD_HASH_METHOD=args.hash_method,
+            SECRET_KEY=secrets.token_hex(32),
+        )
+        self.workdir = workdir
+
+    def setup(self):
+        run_setup([sys.executable, "-c", "from app import app, db\nwith app.app_context(): db.create_all()"],
+                  BACKEND_DIR, self.env)
+        users_file = os.path.join(self.workdir, "users.ndjson")
+        with open(users_file, "w") as f:
+            for email, password in self.passwords.items():
+                f.write(json.dumps({"email": email, "password": password, "name": "Bench"}) + "\n")
+        run_setup([sys.executable, "import_users.py", users_file, "--database-url", self.env["DATABASE_URL"]],
+                  BACKEND_DIR, self.env)
+
+    def process(self, log_dir: str) -> ServiceProcess:
+        command = [sys.executable, "-m", "flask", "--app", "app", "run", "--port", "{port}", "--no-reload", "--with-threads"]
+        return ServiceProcess(self.name, command, BACKEND_DIR, self.env, self.ready_path, log_dir)
+
+    async def seed(self, client):
+        pass
+
+    def mix(self):
+        return [(self.args.login_weight, self.login), (self.args.upload_weight, self.upload)]
+
+    async def login(self, client, recorder, rng):
+        email = rng.choice(self.emails)
+        # A few failed logins, reported apart so their expected 401s don't read as errors
+        if rng.random() < 0.05:
+            label, password = "POST /api/users/login (wrong password)", "wrong-password"
+        else:
+            label, password = "POST /api/users/login", self.passwords[email]
+        await timed(recorder, label, client.post(
+            "/api/users/login", json={"username": email, "password": password}
+        ))
+
+    async def upload(self, client, recorder, rng):
+        image = rng.choice(self.images)
+        await timed(recorder, "POST /api/upload", client.post(
+            "/api/upload", files={"image": ("photo.jpg", image, "image/jpeg")}, data={"user_id": "1"}
+        ))
+
+
+class StyleScenario:
+    """Style service: profile reads, writes, bulk lookups and similarity"""
+
+    name = "style"
+    ready_path = "/ready"
+
+    def __init__(self, args, workdir: str):
+        self.args = args
+        database = os.path.join(workdir, "styles.db")
+        self.env = service_env(
+            DATABASE_URL=f"sqlite:///{database}?timeout=30",
+            ASYNC_DATABASE_URL=f"sqlite+aiosqlite:///{database}?timeout=30",
+        )
+        self.cwd = os.path.join(BACKEND_DIR, "style-service")
+
+    def setup(self):
+        run_setup([sys.executable, "init_db.py"], self.cwd, self.env)
+
+    def process(self, log_dir: str) -> ServiceProcess:
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--port", "{port}", "--log-level", "warning"]
+        return ServiceProcess(self.name, command, self.cwd, self.env, self.ready_path, log_dir)
+
+    def preferences(self, rng) -> list:
+        styles = rng.sample(STYLE_NAMES, rng.randint(2, 5))
+        return [{"style_name": name, "percentage": rng.randint(5, 60)} for name in styles]
+
+    async def seed(self, client):
+        rng = random.Random(self.args.seed)
+        profiles = [{"user_id": user_id, "preferences": self.preferences(rng)} for user_id in range(1, self.args.users + 1)]
+        for start in range(0, len(profiles), 500):
+            response = await client.post("/api/styles/bulk", json=profiles[start:start + 500], timeout=120)
+            response.raise_for_status()
+
+    def mix(self):
+        return [(60, self.read), (15, self.write), (15, self.lookup), (10, self.similar)]
+
+    def user_id(self, rng) -> int:
+        return rng.randint(1, self.args.users)
+
+    async def read(self, client, recorder, rng):
+        await timed(recorder, "GET /api/users/{id}/styles", client.get(f"/api/users/{self.user_id(rng)}/styles"))
+
+    async def write(self, client, recorder, rng):
+        await timed(recorder, "POST /api/users/{id}/styles", client.post(
+            f"/api/users/{self.user_id(rng)}/styles", json=self.preferences(rng)
+        ))
+
+    async def lookup(self, client, recorder, rng):
+        user_ids = [self.user_id(rng) for _ in range(50)]
+        await timed(recorder, "POST /api/styles/lookup", client.post("/api/styles/lookup", json={"user_ids": user_ids}))
+
+    async def similar(self, client, recorder, rng):
+        await timed(recorder, "GET /api/users/{id}/similar", client.get(f"/api/users/{self.user_id(rng)}/similar?k=10"))
+
+
+class ChatScenario:
+    """Chatbot against fake_gemini: repeated and unique questions, unary and streamed"""
+
+    name = "chatbot"
+    ready_path = "/ready"
+
+    def __init__(self, args, workdir: str):
+        self.args = args
+        self.env = service_env(
+            GEMINI_MODEL_FACTORY="fake_gemini:FakeGenerativeModel",
+            FAKE_GEMINI_LATENCY=args.gemini_latency,
+            FAKE_GEMINI_JITTER=args.gemini_jitter,
+            FAKE_GEMINI_CHUNKS=args.gemini_chunks,
+            FAKE_GEMINI_CHUNK_DELAY=args.gemini_chunk_delay,
+            # Admission control is measured separately; keep it from capping the run
+            GEMINI_RATE_LIMIT=args.gemini_rate_limit,
+            GEMINI_RATE_BURST=args.gemini_rate_limit,
+        )
+        self.cwd = os.path.join(BACKEND_DIR, "chatbot")
+
+    def setup(self):
+        pass
+
+    def process(self, log_dir: str) -> ServiceProcess:
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--port", "{port}", "--log-level", "warning"]
+        return ServiceProcess(self.name, command, self.cwd, self.env, self.ready_path, log_dir)
+
+    async def seed(self, client):
+        pass
+
+    def mix(self):
+        return [(70, self.chat), (30, self.stream)]
+
+    def message(self, rng) -> dict:
+        if rng.random() < self.args.repeat_ratio:
+            return {"message": rng.choice(POPULAR_PROMPTS)}
+        message = {"message": f"Outfit idea #{rng.getrandbits(48)} for {rng.choice(STYLE_NAMES).lower()} weekend"}
+        if rng.random() < 0.3:
+            message["conversation_id"] = f"bench-{rng.randrange(200)}"
+        return message
+
+    async def chat(self, client, recorder, rng):
+        await timed(recorder, "POST /chat", client.post("/chat", json=self.message(rng)))
+
+    async def stream(self, client, recorder, rng):
+        started = time.perf_counter()
+        status = "error"
+        try:
+            async with client.stream("POST", "/chat/stream", json=self.message(rng)) as response:
+                status = response.status_code
+                first = True
+                async for _ in response.aiter_bytes():
+                    if first:
+                        recorder.record("POST /chat/stream (first byte)", time.perf_counter() - started, status)
+                        first = False
+        except httpx.HTTPError:
+            pass
+        recorder.record("POST /chat/stream", time.perf_counter() - started, status)
+
+
+SCENARIOS = {"app": AppScenario, "style": StyleScenario, "chatbot": ChatScenario}
+
+
+# --- Load generation ---
+
+async def drive(scenario, service: ServiceProcess, args) -> dict:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=service.base_url, limits=limits, timeout=args.timeout) as client:
+        await scenario.seed(client)
+        weights, actions = zip(*scenario.mix())
+        deadline = time.monotonic() + args.warmup + args.duration
+        recorder.measure_from = time.monotonic() + args.warmup
+
+        async def worker(index: int):
+            rng = random.Random(args.seed * 1000 + index)
+            while time.monotonic() < deadline:
+                action = rng.choices(actions, weights)[0]
+                await action(client, recorder, rng)
+
+        await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    return recorder.summary(args.duration)
+
+
+async def benchmark_service(name: str, args, workdir: str) -> dict:
+    scenario = SCENARIOS[name](args, workdir)
+    print(f"[{name}] preparing stand-ins...")
+    scenario.setup()
+    service = scenario.process(workdir)
+    service.start()
+    try:
+        ready_seconds = await service.wait_ready()
+        print(f"[{name}] ready in {ready_seconds:.2f}s; {args.warmup}s warm-up, {args.duration}s measured "
+              f"with {args.concurrency} clients")
+        endpoints = await drive(scenario, service, args)
+    finally:
+        service.stop()
+    return {"ready_seconds": round(ready_seconds, 3), "endpoints": endpoints}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(results: dict):
+    for service, data in results["services"].items():
+        print(f"\n{service} (ready in {data['ready_seconds']}s)")
+        print(f"  {'endpoint':<40} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7}")
+        for label, stats in data["endpoints"].items():
+            print(f"  {label:<40} {stats['throughput_rps']:>8.1f} {stats['p50_ms']:>7.1f}ms "
+                  f"{stats['p95_ms']:>7.1f}ms {stats['p99_ms']:>7.1f}ms {stats['errors']:>7}")
+
+
+def compare(baseline_path: str, current_path: str):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(current_path) as f:
+        current = json.load(f)
+    print(f"{baseline['commit']} -> {current['commit']}")
+    for service, data in current["services"].items():
+        base_endpoints = baseline["services"].get(service, {}).get("endpoints", {})
+        print(f"\n{service}")
+        for label, stats in data["endpoints"].items():
+            base = base_endpoints.get(label)
+            if base is None:
+                print(f"  {label:<40} (new)")
+                continue
+            deltas = []
+            for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+                change = 100 * (stats[key] - base[key]) / base[key] if base[key] else 0.0
+                deltas.append(f"{key.replace('_ms', '').replace('throughput_rps', 'req/s')} {change:+.1f}%")
+            print(f"  {label:<40} " + "  ".join(deltas))
+
+
+async def main(args):
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("compare", "output")},
+        "services": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        for name in args.services.split(","):
+            results["services"][name] = await benchmark_service(name, args, workdir)
+
+    print_results(results)
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['commit']}-{int(time.time())}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved results to {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Python services against local stand-ins")
+    parser.add_argument("--services", default="app,style,chatbot", help="comma-separated: app, style, chatbot")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds per service")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds before measuring")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent closed-loop clients")
+    parser.add_argument("--timeout", type=float, default=30, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--users", type=int, default=1000, help="users seeded into each database")
+    parser.add_argument("--images", type=int, default=40, help="distinct images in the upload mix")
+    parser.add_argument("--login-weight", type=int, default=70)
+    parser.add_argument("--upload-weight", type=int, default=30)
+    parser.add_argument("--hash-method", default="pbkdf2:sha256:600000",
+                        help="password hash method for seeded users and the app")
+    parser.add_argument("--gemini-latency", type=float, default=0.8, help="fake Gemini time to first token")
+    parser.add_argument("--gemini-jitter", type=float, default=0.2)
+    parser.add_argument("--gemini-chunks", type=int, default=20)
+    parser.add_argument("--gemini-chunk-delay", type=float, default=0.02)
+    parser.add_argument("--gemini-rate-limit", type=float, default=10000)
+    parser.add_argument("--repeat-ratio", type=float, default=0.3, help="share of chat messages that repeat")
+    parser.add_argument("--output", help="results file (default: results/<commit>-<time>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="diff two results files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+    else:
+        asyncio.run(main(args))
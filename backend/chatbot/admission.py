@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__("Too many requests, please retry later")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Token-bucket rate limit with a bounded FIFO wait queue in front of the upstream"""
+
+    def __init__(self, rate: float = 5.0, burst: int = 10, max_queue: int = 50, max_wait: float = 10.0):
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._queue_lock = asyncio.Lock()
+        # Admissions in progress by request key; identical requests share one token
+        self._pending = {}
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait_seen = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _retry_after(self) -> float:
+        # Time for the current queue plus this request to drain at the refill rate
+        return (self.queue_depth + 1) / self.rate
+
+    async def admit(self, key: str):
+        """Acquire a token for key, or share the admission of an identical request already waiting"""
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self.acquire())
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+        try:
+            # Shielded so one waiter disconnecting doesn't cancel the admission for the rest
+            await asyncio.shield(pending)
+        except AdmissionRejected as e:
+            raise AdmissionRejected(e.retry_after) from None
+
+    async def acquire(self):
+        self._refill()
+        if self.queue_depth == 0 and self._tokens >= 1:
+            self._tokens -= 1
+            self.admitted += 1
+            return
+
+        if self.queue_depth >= self.max_queue or self._retry_after() > self.max_wait:
+            self.rejected += 1
+            raise AdmissionRejected(self._retry_after())
+
+        started = time.monotonic()
+        self.queue_depth += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        try:
+            # asyncio.Lock wakes waiters in arrival order, so the queue stays FIFO
+            async with self._queue_lock:
+                self._refill()
+                if self._tokens < 1:
+                    await asyncio.sleep((1 - self._tokens) / self.rate)
+                    self._refill()
+                self._tokens -= 1
+        finally:
+            self.queue_depth -= 1
+
+        waited = time.monotonic() - started
+        self.admitted += 1
+        self.total_wait += waited
+        self.max_wait_seen = max(self.max_wait_seen, waited)
+
+    def stats(self) -> dict:
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "queue_depth": self.queue_depth,
+            "pending_keys": len(self._pending),
+            "max_queue": self.max_queue,
+            "max_queue_depth": self.max_queue_depth,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_wait_seconds": self.total_wait / self.admitted if self.admitted else 0.0,
+            "max_wait_seconds": self.max_wait_seen,
+        }
@@ -0,0 +1,7 @@
+import re
+
+
+def normalize_prompt(text: str) -> str:
+    # Case, spacing and trailing punctuation don't change the question being asked
+    text = re.sub(r"\s+", " ", text.strip().lower())
+    return text.rstrip(" ?!.")
@@ -0,0 +1,94 @@
+import time
+import threading
+from collections import OrderedDict, deque
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough Gemini tokenizer estimate (~4 characters per token), good enough for budgeting
+    return max(1, len(text) // 4)
+
+
+class Conversation:
+    def __init__(self, max_turns: int, summary_token_budget: int, context_token_budget: int):
+        self.turns = deque()
+        self.summary = ""
+        self.max_turns = max_turns
+        self.summary_token_budget = summary_token_budget
+        # The summary's share is reserved up front, so summary plus window never exceeds the context budget
+        self.window_token_budget = context_token_budget - summary_token_budget
+        self.window_tokens = 0
+        self.last_used = time.monotonic()
+
+    def add_turn(self, user_text: str, assistant_text: str):
+        tokens = estimate_tokens(user_text) + estimate_tokens(assistant_text)
+        self.turns.append((user_text, assistant_text, tokens))
+        self.window_tokens += tokens
+        # Oldest turns beyond the turn or token limit are folded so the summary still covers them
+        while self.turns and (len(self.turns) > self.max_turns or self.window_tokens > self.window_token_budget):
+            user_text, assistant_text, tokens = self.turns.popleft()
+            self.window_tokens -= tokens
+            self._fold_into_summary(user_text, assistant_text)
+
+    def _fold_into_summary(self, user_text: str, assistant_text: str):
+        # Keep an extractive summary of turns that fell out of the window, trimmed to budget
+        line = f"- User asked about: {user_text[:160]}"
+        self.summary = f"{self.summary}\n{line}" if self.summary else line
+        max_chars = self.summary_token_budget * 4
+        if len(self.summary) > max_chars:
+            self.summary = self.summary[-max_chars:].split("\n", 1)[-1]
+
+    def context(self) -> str:
+        parts = []
+        if self.summary:
+            parts.append(f"Earlier in this conversation:\n{self.summary}")
+        parts.extend(f"User: {user_text}\nAssistant: {assistant_text}" for user_text, assistant_text, _ in self.turns)
+        return "\n\n".join(parts)
+
+
+class ConversationStore:
+    """In-memory conversation sessions, bounded by count (LRU) and idle TTL"""
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: float = 1800,
+                 max_turns: int = 20, summary_token_budget: int = 256, context_token_budget: int = 1024):
+        if context_token_budget <= summary_token_budget:
+            # Otherwise every turn would be folded into the summary and no recent turns kept
+            raise ValueError("context_token_budget must be greater than summary_token_budget")
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self.summary_token_budget = summary_token_budget
+        self.context_token_budget = context_token_budget
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, conversation_id: str) -> Conversation:
+        with self._lock:
+            now = time.monotonic()
+            session = self._sessions.get(conversation_id)
+            if session is not None and now - session.last_used > self.ttl_seconds:
+                del self._sessions[conversation_id]
+                self.evictions += 1
+                session = None
+            if session is None:
+                session = Conversation(self.max_turns, self.summary_token_budget, self.context_token_budget)
+                self._sessions[conversation_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evictions += 1
+            session.last_used = now
+            self._sessions.move_to_end(conversation_id)
+            return session
+
+    def delete(self, conversation_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(conversation_id, None) is not None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "ttl_seconds": self.ttl_seconds,
+                "evictions": self.evictions,
+            }
@@ -1,13 +1,52 @@
+import time
+BOOT_STARTED = time.monotonic()
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-import google.generativeai as genai
+from typing import List, Optional
+import asyncio
+import importlib
+import json
+import math
 import os
+import threading
 from dotenv import load_dotenv
+from cache import normalize_prompt
+from singleflight import SingleFlight
+from conversations import ConversationStore, estimate_tokens
+from admission import AdmissionController, AdmissionRejected
+from fashion_common.cache import TTLCache
+from fashion_common.instrumentation import instrument_fastapi, track_llm_call
 
 # Load environment variables
 load_dotenv()
 
+# Max number of Gemini calls allowed in flight at once
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+
+# Response cache settings
+CHAT_CACHE_SIZE = int(os.getenv("CHAT_CACHE_SIZE", "1024"))
+CHAT_CACHE_TTL = float(os.getenv("CHAT_CACHE_TTL", "3600"))
+
+# Batch endpoint limits
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+BATCH_MAX_PARALLEL = int(os.getenv("BATCH_MAX_PARALLEL", "4"))
+
+# Conversation memory settings
+CONVERSATION_MAX_SESSIONS = int(os.getenv("CONVERSATION_MAX_SESSIONS", "10000"))
+CONVERSATION_TTL = float(os.getenv("CONVERSATION_TTL", "1800"))
+CONVERSATION_MAX_TURNS = int(os.getenv("CONVERSATION_MAX_TURNS", "20"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1024"))
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", "256"))
+
+# Admission control in front of the Gemini quota
+GEMINI_RATE_LIMIT = float(os.getenv("GEMINI_RATE_LIMIT", "5"))
+GEMINI_RATE_BURST = int(os.getenv("GEMINI_RATE_BURST", "10"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "50"))
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "10"))
+
 # Initialize FastAPI app
 app = FastAPI()
 
@@ -20,32 +59,285 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configure Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-model = genai.GenerativeModel('gemini-pro')
+# Prometheus /metrics: route latency plus Gemini latency and token counts
+instrument_fastapi(app)
+
+# Configure Gemini; the SDK is heavy, so it is imported by the warm-up task or on first use
+GEMINI_MODEL = 'gemini-pro'
+# "module:callable" building a stand-in model instead, e.g. the benchmarks' fake_gemini
+GEMINI_MODEL_FACTORY = os.getenv("GEMINI_MODEL_FACTORY")
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None and GEMINI_MODEL_FACTORY:
+                module_name, _, factory = GEMINI_MODEL_FACTORY.partition(":")
+                _model = getattr(importlib.import_module(module_name), factory)(GEMINI_MODEL)
+            elif _model is None:
+                import google.generativeai as genai
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                _model = genai.GenerativeModel(GEMINI_MODEL)
+    return _model
+
+async def load_model():
+    # The first import runs in a thread so it never stalls the event loop
+    return _model or await asyncio.to_thread(get_model)
+
+# Caps concurrent upstream calls so a burst can't exhaust the Gemini quota at once
+gemini_semaphore = asyncio.Semaphore(GEMINI_MAX_CONCURRENCY)
+
+# Repeat questions are answered from memory instead of another Gemini round trip
+response_cache = TTLCache(max_size=CHAT_CACHE_SIZE, ttl_seconds=CHAT_CACHE_TTL)
+
+# Identical prompts arriving together share one upstream call
+inflight = SingleFlight()
+
+# Server-side conversation history so clients don't resend whole transcripts
+conversations = ConversationStore(
+    max_sessions=CONVERSATION_MAX_SESSIONS,
+    ttl_seconds=CONVERSATION_TTL,
+    max_turns=CONVERSATION_MAX_TURNS,
+    summary_token_budget=SUMMARY_TOKEN_BUDGET,
+    context_token_budget=CONTEXT_TOKEN_BUDGET,
+)
+
+# Requests beyond the rate and queue limits are turned away with 429 instead of failing upstream
+admission = AdmissionController(
+    rate=GEMINI_RATE_LIMIT,
+    burst=GEMINI_RATE_BURST,
+    max_queue=ADMISSION_MAX_QUEUE,
+    max_wait=ADMISSION_MAX_WAIT,
+)
 
 class ChatMessage(BaseModel):
     message: str
+    conversation_id: Optional[str] = None
+
+def build_prompt(message: ChatMessage, context: str = "") -> str:
+    # Create fashion-focused prompt
+    prompt = f"""As a fashion AI assistant, please help with: {message.message}
+        Focus on providing specific, actionable fashion advice and current trends."""
+    if context:
+        prompt = f"{context}\n\n{prompt}"
+    return prompt
+
+def conversation_context(message: ChatMessage) -> str:
+    if not message.conversation_id:
+        return ""
+    return conversations.get(message.conversation_id).context()
+
+def remember_turn(message: ChatMessage, reply: str):
+    if message.conversation_id:
+        conversations.get(message.conversation_id).add_turn(message.message, reply)
+
+def request_key(message: ChatMessage, context: str) -> str:
+    # Replies that depend on history are only shared within their own conversation
+    key = normalize_prompt(message.message)
+    if context:
+        key = f"{message.conversation_id}:{key}"
+    return key
+
+async def admit(cache_key: str):
+    # Requests joining a call already in flight, or already queued for admission, don't use any extra quota
+    if not inflight.is_running(cache_key):
+        await admission.admit(cache_key)
+
+def rate_limited(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=str(e),
+        headers={"Retry-After": str(math.ceil(e.retry_after))},
+    )
+
+def sse_event(data: dict, event: str = None) -> str:
+    # Format a single server-sent event frame
+    frame = f"data: {json.dumps(data)}\n\n"
+    if event:
+        frame = f"event: {event}\n" + frame
+    return frame
+
+def record_usage(call: dict, response, prompt: str, text: str):
+    # Prefer the token counts Gemini reports; estimate when the SDK doesn't return them
+    usage = getattr(response, "usage_metadata", None)
+    call["prompt_tokens"] = getattr(usage, "prompt_token_count", 0) or estimate_tokens(prompt)
+    call["completion_tokens"] = getattr(usage, "candidates_token_count", 0) or estimate_tokens(text)
+
+def generate_reply(prompt: str):
+    # Single-chunk producer for the plain /chat path
+    async def produce():
+        async with gemini_semaphore:
+            model = await load_model()
+            with track_llm_call(GEMINI_MODEL, "unary") as call:
+                response = await model.generate_content_async(prompt)
+                record_usage(call, response, prompt, response.text)
+        yield response.text
+    return produce
+
+def generate_stream(prompt: str):
+    # Token-by-token producer for the streaming path
+    async def produce():
+        async with gemini_semaphore:
+            model = await load_model()
+            with track_llm_call(GEMINI_MODEL, "stream") as call:
+                response = await model.generate_content_async(prompt, stream=True)
+                text = []
+                async for chunk in response:
+                    if chunk.text:
+                        text.append(chunk.text)
+                        yield chunk.text
+                record_usage(call, response, prompt, "".join(text))
+    return produce
+
+async def answer(message: ChatMessage) -> str:
+    context = conversation_context(message)
+    cache_key = request_key(message, context)
+    cached = response_cache.get(cache_key) if not context else None
+    if cached is not None:
+        remember_turn(message, cached)
+        return cached
+
+    prompt = build_prompt(message, context)
+    await admit(cache_key)
+
+    # Get response from Gemini, joining any identical call already in flight
+    text = await inflight.do(cache_key, generate_reply(prompt))
+
+    # Log for debugging
+    print(f"Received message: {message.message}")
+    print(f"AI Response: {text}")
+
+    if not context:
+        response_cache.set(cache_key, text)
+    remember_turn(message, text)
+    return text
 
 @app.post("/chat")
 async def chat(message: ChatMessage):
     try:
-        # Create fashion-focused prompt
-        prompt = f"""As a fashion AI assistant, please help with: {message.message}
-        Focus on providing specific, actionable fashion advice and current trends."""
-        
-        # Get response from Gemini
-        response = model.generate_content(prompt)
-        
-        # Log for debugging
-        print(f"Received message: {message.message}")
-        print(f"AI Response: {response.text}")
-        
-        return {"response": response.text}
+        return {"response": await answer(message)}
+    except AdmissionRejected as e:
+        raise rate_limited(e)
     except Exception as e:
         print(f"Error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/chat/batch")
+async def chat_batch(messages: List[ChatMessage]):
+    """Answer many prompts in one request; results keep the input order"""
+    if len(messages) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_ITEMS} messages")
+
+    # Limits how many items of this batch are worked on at once
+    batch_semaphore = asyncio.Semaphore(BATCH_MAX_PARALLEL)
+
+    async def run_item(message: ChatMessage) -> dict:
+        async with batch_semaphore:
+            try:
+                return {"response": await answer(message)}
+            except Exception as e:
+                print(f"Batch item error: {str(e)}")
+                return {"error": str(e)}
+
+    results = await asyncio.gather(*(run_item(m) for m in messages))
+    return {"results": results}
+
+@app.post("/chat/stream")
+async def chat_stream(message: ChatMessage):
+    """Stream the Gemini reply as server-sent events while it is generated"""
+    context = conversation_context(message)
+    prompt = build_prompt(message, context)
+    cache_key = request_key(message, context)
+    print(f"Received streaming message: {message.message}")
+
+    cached = response_cache.get(cache_key) if not context else None
+    if cached is None:
+        # Admission has to be decided before the stream's headers go out
+        try:
+            await admit(cache_key)
+        except AdmissionRejected as e:
+            raise rate_limited(e)
+
+    async def event_stream():
+        try:
+            if cached is not None:
+                remember_turn(message, cached)
+                yield sse_event({"token": cached})
+                yield sse_event({}, event="done")
+                return
+
+            parts = []
+            async for token in inflight.stream(cache_key, generate_stream(prompt)):
+                parts.append(token)
+                yield sse_event({"token": token})
+            # Only complete replies are cached or remembered
+            reply = "".join(parts)
+            if not context:
+                response_cache.set(cache_key, reply)
+            remember_turn(message, reply)
+            yield sse_event({}, event="done")
+        except Exception as e:
+            # Headers are already sent, so report the failure in-band
+            print(f"Streaming error: {str(e)}")
+            yield sse_event({"error": str(e)}, event="error")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.delete("/conversations/{conversation_id}")
+async def delete_conversation(conversation_id: str):
+    if not conversations.delete(conversation_id):
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return {"message": "Conversation deleted"}
+
+@app.get("/conversations/stats")
+async def conversation_stats():
+    return conversations.stats()
+
+@app.get("/admission/stats")
+async def admission_stats():
+    return admission.stats()
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return response_cache.stats()
+
+@app.get("/inflight/stats")
+async def inflight_stats():
+    return inflight.stats()
+
+# Readiness for /ready; the process is live as soon as it serves /health
+startup_state = {"ready": False, "import_seconds": time.monotonic() - BOOT_STARTED, "startup_seconds": None, "error": None}
+
+async def warm_up():
+    started = time.monotonic()
+    try:
+        await load_model()
+        startup_state["ready"] = True
+    except Exception as e:
+        startup_state["error"] = str(e)
+        print(f"Error loading Gemini SDK: {e}")
+    startup_state["startup_seconds"] = time.monotonic() - BOOT_STARTED
+    print(f"Startup finished in {startup_state['startup_seconds']:.2f}s "
+          f"(imports {startup_state['import_seconds']:.2f}s, warm-up {time.monotonic() - started:.2f}s)")
+
+@app.on_event("startup")
+async def start_warm_up():
+    # Runs in the background so liveness checks pass while the SDK loads
+    app.state.warm_up = asyncio.create_task(warm_up())
+
 @app.get("/health")
 async def health_check():
-    return {"status": "ok"} 
\ No newline at end of file
+    return {"status": "ok"}
+
+@app.get("/ready")
+async def readiness_check():
+    """503 until the Gemini client is loaded"""
+    if not startup_state["ready"]:
+        return JSONResponse(status_code=503, content={"status": "starting", **startup_state})
+    return {"status": "ready", **startup_state}
@@ -0,0 +1,101 @@
+import asyncio
+
+
+class UpstreamError(Exception):
+    """Raised in each request sharing a call that failed; the original error is its __cause__"""
+
+
+class Flight:
+    """One upstream call whose chunks are broadcast to every waiting request"""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self._changed = asyncio.Condition()
+
+    async def publish(self, chunk: str):
+        async with self._changed:
+            self.chunks.append(chunk)
+            self._changed.notify_all()
+
+    async def finish(self, error: Exception = None):
+        async with self._changed:
+            self.error = error
+            self.done = True
+            self._changed.notify_all()
+
+    async def subscribe(self):
+        # Replays chunks already produced, then follows the live call
+        index = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: len(self.chunks) > index or self.done)
+                pending = self.chunks[index:]
+                finished = self.done
+            for chunk in pending:
+                yield chunk
+            index += len(pending)
+            if finished and index == len(self.chunks):
+                if self.error is not None:
+                    # A fresh exception per waiter, so tracebacks don't pile up on the shared one
+                    raise UpstreamError(str(self.error)) from self.error
+                return
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key onto a single upstream call"""
+
+    def __init__(self):
+        self._flights = {}
+        # The event loop only keeps weak references to tasks; these keep running leaders alive
+        self._tasks = set()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def is_running(self, key: str) -> bool:
+        return key in self._flights
+
+    def stream(self, key: str, producer):
+        # producer is a zero-arg callable returning an async iterator of chunks;
+        # it only runs if no call for this key is already in flight
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = Flight()
+            self._flights[key] = flight
+            self.leaders += 1
+            # Run detached so a disconnecting client doesn't cancel everyone else
+            task = asyncio.create_task(self._run(key, flight, producer))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            self.coalesced += 1
+        return flight.subscribe()
+
+    async def do(self, key: str, producer) -> str:
+        parts = []
+        async for chunk in self.stream(key, producer):
+            parts.append(chunk)
+        return "".join(parts)
+
+    async def _run(self, key: str, flight: Flight, producer):
+        error = None
+        try:
+            async for chunk in producer():
+                await flight.publish(chunk)
+        except asyncio.CancelledError:
+            error = RuntimeError("Upstream call was cancelled")
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            # Drop the key first so requests arriving after this start a fresh call
+            self._flights.pop(key, None)
+            await flight.finish(error)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,149 @@
+import io
+import numpy as np
+from PIL import Image
+from image_dedup import difference_hash
+
+# Reference colors used to name palette entries
+NAMED_COLORS = {
+    "black": (0, 0, 0),
+    "charcoal": (54, 69, 79),
+    "gray": (128, 128, 128),
+    "silver": (192, 192, 192),
+    "white": (255, 255, 255),
+    "ivory": (255, 255, 240),
+    "beige": (245, 245, 220),
+    "khaki": (195, 176, 145),
+    "tan": (210, 180, 140),
+    "brown": (139, 69, 19),
+    "maroon": (128, 0, 0),
+    "burgundy": (128, 0, 32),
+    "red": (220, 20, 60),
+    "coral": (255, 127, 80),
+    "orange": (255, 140, 0),
+    "mustard": (225, 173, 1),
+    "yellow": (255, 215, 0),
+    "olive": (128, 128, 0),
+    "green": (34, 139, 34),
+    "mint": (152, 255, 152),
+    "teal": (0, 128, 128),
+    "turquoise": (64, 224, 208),
+    "sky blue": (135, 206, 235),
+    "blue": (30, 90, 200),
+    "navy": (25, 25, 112),
+    "lavender": (230, 230, 250),
+    "purple": (128, 0, 128),
+    "magenta": (255, 0, 255),
+    "pink": (255, 182, 193),
+    "rose": (255, 0, 127),
+}
+_COLOR_NAMES = list(NAMED_COLORS)
+_COLOR_VALUES = np.array(list(NAMED_COLORS.values()), dtype=np.float32)
+
+# Nearest named color for every RGB value quantized to 5 bits per channel (32^3 cells),
+# computed once so naming a color is a single array lookup
+_LUT_BITS = 5
+_LUT_SHIFT = 8 - _LUT_BITS
+_levels = (np.arange(1 << _LUT_BITS, dtype=np.float32) + 0.5) * (1 << _LUT_SHIFT)
+_grid = np.stack(np.meshgrid(_levels, _levels, _levels, indexing="ij"), axis=-1).reshape(-1, 3)
+_COLOR_LUT = np.argmin(
+    ((_grid[:, None, :] - _COLOR_VALUES[None, :, :]) ** 2).sum(axis=2), axis=1
+).astype(np.uint8)
+del _levels, _grid
+
+
+def color_name(rgb) -> str:
+    r, g, b = (int(c) >> _LUT_SHIFT for c in rgb)
+    return _COLOR_NAMES[_COLOR_LUT[(r << (2 * _LUT_BITS)) | (g << _LUT_BITS) | b]]
+
+
+def load_thumbnail(image_bytes: bytes, max_side: int = 128) -> Image.Image:
+    """Decode and downsample an image to at most max_side pixels per side, in RGB"""
+    image = Image.open(io.BytesIO(image_bytes))
+    # JPEG can decode straight to a reduced scale, skipping most of the full-size work
+    image.draft("RGB", (max_side, max_side))
+    image = image.convert("RGB")
+    image.thumbnail((max_side, max_side))
+    return image
+
+
+def load_pixels(image_bytes: bytes, max_side: int = 128) -> np.ndarray:
+    """The thumbnail as an (N, 3) float array"""
+    return thumbnail_pixels(load_thumbnail(image_bytes, max_side))
+
+
+def thumbnail_pixels(image: Image.Image) -> np.ndarray:
+    return np.asarray(image, dtype=np.float32).reshape(-1, 3)
+
+
+def kmeans(pixels: np.ndarray, k: int, iterations: int = 20, seed: int = 0):
+    """Vectorized k-means with k-means++ seeding; returns (centers, counts)"""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(pixels))
+    centers = np.empty((k, 3), dtype=np.float32)
+    centers[0] = pixels[rng.integers(len(pixels))]
+    closest = ((pixels - centers[0]) ** 2).sum(axis=1)
+    for i in range(1, k):
+        total = closest.sum()
+        if total == 0:
+            centers[i:] = centers[0]
+            break
+        centers[i] = pixels[rng.choice(len(pixels), p=closest / total)]
+        closest = np.minimum(closest, ((pixels - centers[i]) ** 2).sum(axis=1))
+
+    pixel_norms = (pixels ** 2).sum(axis=1, keepdims=True)
+    for _ in range(iterations):
+        # |x - c|^2 = |x|^2 - 2 x.c + |c|^2, computed for all pixels and centers at once
+        distances = pixel_norms - 2 * pixels @ centers.T + (centers ** 2).sum(axis=1)
+        labels = distances.argmin(axis=1)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, pixels)
+        updated = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centers)
+        if np.allclose(updated, centers, atol=0.5):
+            centers = updated
+            break
+        centers = updated
+
+    distances = pixel_norms - 2 * pixels @ centers.T + (centers ** 2).sum(axis=1)
+    counts = np.bincount(distances.argmin(axis=1), minlength=k)
+    return centers, counts
+
+
+def extract_palette(image_bytes: bytes, colors: int = 5, max_side: int = 128) -> list:
+    return palette_from_pixels(load_pixels(image_bytes, max_side), colors)
+
+
+def palette_from_pixels(pixels: np.ndarray, colors: int = 5) -> list:
+    centers, counts = kmeans(pixels, colors)
+    total = counts.sum()
+    palette = []
+    for index in np.argsort(-counts):
+        if counts[index] == 0:
+            continue
+        rgb = [int(round(c)) for c in np.clip(centers[index], 0, 255)]
+        palette.append({
+            "rgb": rgb,
+            "hex": "#{:02X}{:02X}{:02X}".format(*rgb),
+            "percentage": round(100 * float(counts[index]) / float(total), 1),
+            "name": color_name(rgb),
+        })
+    return palette
+
+
+def analyze_image(image_bytes: bytes, colors: int = 5, max_side: int = 128) -> dict:
+    """Palette plus the summary fields the upload UI shows; runs in a worker process.
+
+    The image is decoded once; the same thumbnail also yields the dHash ("phash")
+    the caller uses for near-duplicate matching.
+    """
+    thumbnail = load_thumbnail(image_bytes, max_side)
+    palette = palette_from_pixels(thumbnail_pixels(thumbnail), colors)
+    names = list(dict.fromkeys(entry["name"] for entry in palette if entry["percentage"] >= 5))
+    return {
+        "analysis": {
+            "colors": names,
+            "patterns": "solid" if palette and palette[0]["percentage"] >= 60 else "multicolor",
+        },
+        "color_palette": palette,
+        "phash": difference_hash(thumbnail),
+    }
@@ -0,0 +1,6 @@
+"""Modules shared by the Flask app and the FastAPI services.
+
+Installed into each service's environment from backend/common:
+
+    pip install -e backend/common
+"""
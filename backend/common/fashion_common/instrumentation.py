@@ -0,0 +1,209 @@
+"""Prometheus metrics shared by the Flask app and the FastAPI services.
+
+Each service mounts it once and serves /metrics:
+
+    init_flask_metrics(app)                  # Flask
+    instrument_fastapi(app)                  # FastAPI / Starlette
+    instrument_engine(engine)                # any SQLAlchemy engine
+    with track_llm_call("gemini-pro", "unary") as call: ...
+
+Services are told apart by the scrape job, so metrics carry no service label.
+Route labels use the route template, never the raw path, to keep cardinality bounded.
+"""
+import time
+from contextlib import contextmanager
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by route",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being served", ["method"])
+
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection",
+    ["engine"], buckets=DB_BUCKETS,
+)
+DB_POOL_CONNECTIONS = Gauge("db_pool_connections", "Pool connections by state", ["engine", "state"])
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "Statement execution time",
+    ["engine", "operation"], buckets=DB_BUCKETS,
+)
+
+LLM_LATENCY = Histogram(
+    "llm_request_duration_seconds", "Upstream model call latency",
+    ["model", "mode", "outcome"], buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens sent to and received from the model", ["model", "direction"])
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def metrics_payload():
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+# --- HTTP ---
+
+def init_flask_metrics(app, path: str = "/metrics"):
+    from flask import Response, g, request
+
+    @app.before_request
+    def start_metrics_timer():
+        g.metrics_started = time.perf_counter()
+        HTTP_IN_FLIGHT.labels(request.method).inc()
+
+    @app.teardown_request
+    def record_request_metrics(exc):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return
+        HTTP_IN_FLIGHT.labels(request.method).dec()
+        status = getattr(g, "metrics_status", 500)
+        route = request.url_rule.rule if request.url_rule else UNMATCHED_ROUTE
+        HTTP_LATENCY.labels(request.method, route, str(status)).observe(time.perf_counter() - started)
+
+    @app.after_request
+    def capture_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.route(path)
+    def metrics():
+        body, content_type = metrics_payload()
+        return Response(body, content_type=content_type)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streamed responses are timed until their last chunk"""
+
+    def __init__(self, app, routes_by_endpoint):
+        self.app = app
+        self.routes_by_endpoint = routes_by_endpoint
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.labels(method).inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.labels(method).dec()
+            HTTP_LATENCY.labels(method, self.route_for(scope), str(status)).observe(time.perf_counter() - started)
+
+    def route_for(self, scope) -> str:
+        # The router fills in the matched route (newer Starlette) or at least its endpoint
+        route = scope.get("route")
+        if route is not None:
+            return route.path
+        return self.routes_by_endpoint().get(scope.get("endpoint"), UNMATCHED_ROUTE)
+
+
+def instrument_fastapi(app, path: str = "/metrics"):
+    from starlette.responses import Response
+
+    routes = {}
+
+    def routes_by_endpoint():
+        # Built on first use, once every route has been registered
+        if not routes:
+            routes.update({r.endpoint: r.path for r in app.routes if hasattr(r, "endpoint")})
+        return routes
+
+    @app.get(path, include_in_schema=False)
+    async def metrics():
+        body, content_type = metrics_payload()
+        return Response(body, media_type=content_type)
+
+    app.add_middleware(MetricsMiddleware, routes_by_endpoint=routes_by_endpoint)
+
+
+# --- SQLAlchemy ---
+
+def instrument_engine(engine, name: str = "default"):
+    """Record pool checkout wait, pool occupancy and per-statement latency for an engine"""
+    from sqlalchemy import event
+
+    _time_pool_checkout(engine.pool, name)
+
+    @event.listens_for(engine, "engine_disposed")
+    def rewrap_pool(engine):
+        # dispose() swaps in a fresh pool
+        _time_pool_checkout(engine.pool, name)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def record_query(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        DB_QUERY_LATENCY.labels(name, operation).observe(time.perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def discard_query_timer(context):
+        timers = context.connection.info.get("query_started") if context.connection is not None else None
+        if timers:
+            timers.pop()
+
+    # Occupancy is read from the pool at scrape time rather than tracked per checkout
+    for state, reader in (
+        ("checked_out", "checkedout"),
+        ("idle", "checkedin"),
+        ("overflow", "overflow"),
+        ("size", "size"),
+    ):
+        # QueuePool reports overflow as negative while below its base size
+        DB_POOL_CONNECTIONS.labels(name, state).set_function(
+            lambda reader=reader: max(0, getattr(engine.pool, reader, lambda: 0)())
+        )
+
+
+def _time_pool_checkout(pool, name: str):
+    # The pool has no "before checkout" event, so the checkout call itself is timed
+    if getattr(pool, "_metrics_wrapped", False):
+        return
+    checkout = pool.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return checkout()
+        finally:
+            DB_POOL_WAIT.labels(name).observe(time.perf_counter() - started)
+
+    pool.connect = timed_connect
+    pool._metrics_wrapped = True
+
+
+# --- Model calls ---
+
+@contextmanager
+def track_llm_call(model: str, mode: str):
+    """Time one model call; set call["prompt_tokens"] / call["completion_tokens"] inside the block"""
+    call = {"prompt_tokens": 0, "completion_tokens": 0}
+    outcome = "error"
+    started = time.perf_counter()
+    try:
+        yield call
+        outcome = "ok"
+    finally:
+        LLM_LATENCY.labels(model, mode, outcome).observe(time.perf_counter() - started)
+        LLM_TOKENS.labels(model, "prompt").inc(call["prompt_tokens"])
+        LLM_TOKENS.labels(model, "completion").inc(call["completion_tokens"])
@@ -0,0 +1,113 @@
+"""Whole-schema introspection in one query, cached in memory.
+
+Both the Flask app and the style service serve their schema debug views from
+a SchemaCache instead of running SHOW TABLES / DESCRIBE per table:
+
+    schema_cache = SchemaCache(engine, ttl_seconds=300)
+    schema_cache.snapshot()   # {"version", "loaded_at", "tables": {name: [column, ...]}}
+
+Any DDL run through the engine (create_all, migrations, ad-hoc CREATE INDEX)
+bumps the version and drops the cached copy. Changes made by other processes
+are picked up when the TTL runs out, or by calling invalidate().
+"""
+import threading
+import time
+from sqlalchemy import event, text
+
+# Columns are reported in DESCRIBE's shape so existing consumers keep working
+MYSQL_SCHEMA_QUERY = text("""
+    SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_KEY, COLUMN_DEFAULT, EXTRA
+    FROM information_schema.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE()
+    ORDER BY TABLE_NAME, ORDINAL_POSITION
+""")
+
+SQLITE_SCHEMA_QUERY = text("""
+    SELECT m.name, p.name, p.type, CASE WHEN p."notnull" THEN 'NO' ELSE 'YES' END,
+           CASE WHEN p.pk THEN 'PRI' ELSE '' END, p.dflt_value, ''
+    FROM sqlite_master AS m JOIN pragma_table_info(m.name) AS p
+    WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+    ORDER BY m.name, p.cid
+""")
+
+DDL_PREFIXES = ("CREATE", "ALTER", "DROP", "RENAME", "TRUNCATE")
+
+
+class SchemaCache:
+    def __init__(self, engine, ttl_seconds: float = 300):
+        self.engine = engine
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self._snapshot = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.loads = 0
+        self.hits = 0
+        self.invalidations = 0
+        event.listen(engine, "after_cursor_execute", self._watch_ddl)
+
+    def _watch_ddl(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip()[:8].upper().startswith(DDL_PREFIXES):
+            self.invalidate()
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._snapshot = None
+            self.invalidations += 1
+
+    def cached(self):
+        """The current snapshot if it is still fresh, without touching the database"""
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() < self._expires_at:
+                self.hits += 1
+                return self._snapshot
+        return None
+
+    def snapshot(self) -> dict:
+        snapshot = self.cached()
+        if snapshot is not None:
+            return snapshot
+        # Concurrent misses wait for a single load instead of each querying the server
+        with self._load_lock:
+            snapshot = self.cached()
+            if snapshot is not None:
+                return snapshot
+            with self._lock:
+                version = self.version
+            tables = self._load()
+            with self._lock:
+                # A DDL statement that ran during the load makes this result stale; keep it uncached
+                snapshot = {"version": version, "loaded_at": time.time(), "tables": tables}
+                if version == self.version:
+                    self._snapshot = snapshot
+                    self._expires_at = time.monotonic() + self.ttl_seconds
+                self.loads += 1
+            return snapshot
+
+    def _load(self) -> dict:
+        query = SQLITE_SCHEMA_QUERY if self.engine.dialect.name == "sqlite" else MYSQL_SCHEMA_QUERY
+        tables = {}
+        with self.engine.connect() as conn:
+            for table, field, type_, null, key, default, extra in conn.execute(query):
+                tables.setdefault(table, []).append({
+                    "Field": field,
+                    "Type": type_,
+                    "Null": null,
+                    "Key": key,
+                    "Default": default,
+                    "Extra": extra,
+                })
+        return tables
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "version": self.version,
+                "cached": self._snapshot is not None,
+                "loads": self.loads,
+                "hits": self.hits,
+                "invalidations": self.invalidations,
+                "ttl_seconds": self.ttl_seconds,
+            }
@@ -0,0 +1,152 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from PIL import Image
+
+
+def content_hash(image_bytes: bytes) -> str:
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def difference_hash(image: Image.Image) -> int:
+    """64-bit difference hash (dHash): robust to re-encoding, resizing and small crops.
+
+    Takes an already decoded image, normally the analysis thumbnail, so it costs no extra decode.
+    """
+    pixels = list(image.convert("L").resize((9, 8), Image.BILINEAR).getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes for Hamming-radius queries"""
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, value: int, key):
+        node = [value, key, {}]
+        self.size += 1
+        if self.root is None:
+            self.root = node
+            return
+        current = self.root
+        while True:
+            distance = hamming(value, current[0])
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def search(self, value: int, radius: int) -> list:
+        # Triangle inequality: only children within [d - r, d + r] can hold matches
+        matches = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= radius:
+                matches.append((distance, node[1]))
+            for edge, child in node[2].items():
+                if distance - radius <= edge <= distance + radius:
+                    stack.append(child)
+        return matches
+
+
+class ImageDedupCache:
+    """Maps exact and near-duplicate images to their stored analysis result"""
+
+    def __init__(self, max_entries: int = 50000, max_distance: int = 6):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+        self._by_content = OrderedDict()  # content hash -> (phash, result)
+        self._tree = BKTree()
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.lookups = 0
+        self.total_lookup_seconds = 0.0
+        self.max_lookup_seconds = 0.0
+
+    def lookup(self, image_bytes: bytes):
+        """Exact-match lookup; returns (content_hash, cached_result), cached_result None on a miss.
+
+        Only hashes the bytes, so it is cheap enough for the request thread. Near
+        duplicates are matched with match() once a worker has computed the dHash.
+        """
+        started = time.perf_counter()
+        digest = content_hash(image_bytes)
+        result = None
+        with self._lock:
+            entry = self._by_content.get(digest)
+            if entry is not None:
+                self._by_content.move_to_end(digest)
+                self.exact_hits += 1
+                result = entry[1]
+            self._record_lookup(time.perf_counter() - started)
+        return digest, result
+
+    def match(self, phash: int):
+        """The result stored for the closest near-duplicate of phash, or None"""
+        started = time.perf_counter()
+        with self._lock:
+            matches = [m for m in self._tree.search(phash, self.max_distance) if m[1] in self._by_content]
+            result = None
+            if matches:
+                _, key = min(matches, key=lambda m: m[0])
+                self._by_content.move_to_end(key)
+                result = self._by_content[key][1]
+                self.near_hits += 1
+            else:
+                self.misses += 1
+            # Same upload as its lookup(): adds time, not another lookup
+            self._record_lookup(time.perf_counter() - started, new_upload=False)
+        return result
+
+    def _record_lookup(self, elapsed: float, new_upload: bool = True):
+        self.lookups += new_upload
+        self.total_lookup_seconds += elapsed
+        self.max_lookup_seconds = max(self.max_lookup_seconds, elapsed)
+
+    def add(self, digest: str, phash: int, result: dict):
+        with self._lock:
+            if digest in self._by_content:
+                return
+            self._by_content[digest] = (phash, result)
+            self._tree.add(phash, digest)
+            while len(self._by_content) > self.max_entries:
+                self._by_content.popitem(last=False)
+            # Evicted hashes stay in the tree until it gets too stale, then it is rebuilt
+            if self._tree.size > 2 * max(len(self._by_content), 1):
+                self._rebuild()
+
+    def _rebuild(self):
+        self._tree = BKTree()
+        for digest, (phash, _) in self._by_content.items():
+            self._tree.add(phash, digest)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.exact_hits + self.near_hits
+            return {
+                "entries": len(self._by_content),
+                "max_entries": self.max_entries,
+                "max_distance": self.max_distance,
+                "exact_hits": self.exact_hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_rate": hits / self.lookups if self.lookups else 0.0,
+                "avg_lookup_ms": 1000 * self.total_lookup_seconds / self.lookups if self.lookups else 0.0,
+                "max_lookup_ms": 1000 * self.max_lookup_seconds,
+            }
@@ -0,0 +1,241 @@
+"""Bulk-import users from CSV or NDJSON into the Users table.
+
+Records are streamed, never loaded whole. Plaintext passwords are hashed across
+a process pool while the previous batch is being inserted, and each batch is
+one transaction. Emails that already exist are skipped (or updated with
+--on-duplicate update) and are never hashed.
+
+Each record needs an email and either a plaintext password or a password_hash
+that check_password_hash understands; name and gender are optional. Lines that
+can't be parsed or aren't usable records are reported and skipped:
+
+    python import_users.py users.csv --batch-size 2000 --workers 16
+    python import_users.py users.ndjson --on-duplicate update
+    cat users.ndjson | python import_users.py - --format ndjson
+
+Hashing dominates the cost at the configured PASSWORD_HASH_METHOD, so imports
+of pre-hashed passwords run at insert speed.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, create_engine, func, inspect, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from werkzeug.security import generate_password_hash
+from config import Config
+from auth import normalize_email
+
+# Mirrors backend/src/config/schema.sql
+metadata = MetaData()
+users_table = Table(
+    "Users", metadata,
+    Column("user_id", Integer, primary_key=True, autoincrement=True),
+    Column("name", String(255), nullable=False),
+    Column("email", String(255), nullable=False, unique=True),
+    Column("password", String(255), nullable=False),
+    Column("gender", String(20), nullable=False),
+    Column("created_at", DateTime, server_default=func.now()),
+)
+
+UPDATED_COLUMNS = ("name", "password", "gender")
+
+
+def read_records(stream, fmt: str):
+    """Yield (line_number, record) pairs without reading the whole input"""
+    if fmt == "csv":
+        for line_number, record in enumerate(csv.DictReader(stream), start=2):
+            yield line_number, record
+    else:
+        for line_number, line in enumerate(stream, start=1):
+            if line.strip():
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Rejected by clean_record like any other unusable record
+                    record = None
+                yield line_number, record
+
+
+def clean_record(record: dict):
+    """Normalize one input record, or return None if it can't be imported"""
+    if not isinstance(record, dict):
+        return None
+    email = normalize_email(record.get("email"))
+    password = record.get("password") or None
+    password_hash = record.get("password_hash") or None
+    if not email or "@" not in email or not (password or password_hash):
+        return None
+    return {
+        "email": email,
+        "name": (record.get("name") or "").strip(),
+        "gender": (record.get("gender") or "").strip(),
+        "password": password,
+        "password_hash": password_hash,
+    }
+
+
+def hash_passwords(passwords: list, method: str) -> list:
+    # Runs in a worker process; one call per chunk keeps pickling overhead low
+    return [generate_password_hash(password, method) for password in passwords]
+
+
+def existing_emails(conn, emails: list) -> set:
+    return set(conn.execute(select(users_table.c.email).where(users_table.c.email.in_(emails))).scalars())
+
+
+def upsert_statement(dialect: str, on_duplicate: str):
+    if dialect == "mysql":
+        stmt = mysql_insert(users_table)
+        if on_duplicate == "update":
+            return stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in UPDATED_COLUMNS})
+        return stmt.prefix_with("IGNORE")
+    stmt = sqlite_insert(users_table)
+    if on_duplicate == "update":
+        return stmt.on_conflict_do_update(
+            index_elements=["email"], set_={c: stmt.excluded[c] for c in UPDATED_COLUMNS}
+        )
+    return stmt.on_conflict_do_nothing(index_elements=["email"])
+
+
+class Importer:
+    def __init__(self, engine, pool, workers: int, hash_method: str, batch_size: int, on_duplicate: str, dry_run: bool):
+        self.engine = engine
+        self.pool = pool
+        self.workers = workers
+        self.hash_method = hash_method
+        self.batch_size = batch_size
+        self.on_duplicate = on_duplicate
+        self.dry_run = dry_run
+        self.statement = upsert_statement(engine.dialect.name, on_duplicate)
+        self.read = 0
+        self.rejected = 0
+        self.duplicates = 0
+        self.written = 0
+        self.hashed = 0
+        self.logged_invalid = 0
+
+    def prepare(self, records: list):
+        """Drop invalid and duplicate rows, then start hashing.
+
+        Returns (rows, pending hash futures, counts); the counts are added to the
+        totals when the batch is written, so progress lines describe whole batches.
+        """
+        rows = {}
+        counts = {"read": len(records), "rejected": 0, "duplicates": 0}
+        for line_number, record in records:
+            row = clean_record(record)
+            if row is None:
+                counts["rejected"] += 1
+                self.logged_invalid += 1
+                if self.logged_invalid <= 10:
+                    print(f"Skipping invalid record on line {line_number}", file=sys.stderr)
+                continue
+            # Later records win within a batch
+            if row["email"] in rows:
+                counts["duplicates"] += 1
+            rows[row["email"]] = row
+
+        if self.on_duplicate == "skip" and rows:
+            # Existing users are dropped before hashing, the expensive part
+            with self.engine.connect() as conn:
+                for email in existing_emails(conn, list(rows)):
+                    del rows[email]
+                    counts["duplicates"] += 1
+
+        rows = list(rows.values())
+        to_hash = [row for row in rows if not row["password_hash"]]
+        # A few chunks per worker balances the load without pickling one task per password
+        chunk = max(1, len(to_hash) // (4 * self.workers))
+        futures = [
+            (to_hash[start:start + chunk], self.pool.submit(
+                hash_passwords, [row["password"] for row in to_hash[start:start + chunk]], self.hash_method
+            ))
+            for start in range(0, len(to_hash), chunk)
+        ]
+        return rows, futures, counts
+
+    def write(self, rows: list, futures: list, counts: dict):
+        self.read += counts["read"]
+        self.rejected += counts["rejected"]
+        self.duplicates += counts["duplicates"]
+        for chunk, future in futures:
+            for row, password_hash in zip(chunk, future.result()):
+                row["password_hash"] = password_hash
+            self.hashed += len(chunk)
+        values = [
+            {"name": row["name"], "email": row["email"], "password": row["password_hash"], "gender": row["gender"]}
+            for row in rows
+        ]
+        if self.dry_run:
+            self.written += len(values)
+            return
+        if not values:
+            return
+        with self.engine.begin() as conn:
+            result = conn.execute(self.statement, values)
+        if self.on_duplicate == "skip":
+            # Rows that lost a race with a concurrent registration are ignored by the insert
+            self.duplicates += len(values) - max(result.rowcount, 0)
+            self.written += max(result.rowcount, 0)
+        else:
+            self.written += len(values)
+
+    def run(self, records):
+        started = time.monotonic()
+        pending = None
+        while True:
+            batch = list(islice(records, self.batch_size))
+            prepared = self.prepare(batch) if batch else None
+            # The previous batch is inserted while this one is being hashed
+            if pending is not None:
+                self.write(*pending)
+            if prepared is None:
+                break
+            if pending is not None:
+                self.report(started)
+            pending = prepared
+        self.report(started, final=True)
+
+    def report(self, started: float, final: bool = False):
+        elapsed = max(time.monotonic() - started, 1e-9)
+        action = "would write" if self.dry_run else "written"
+        line = (f"Read {self.read} records: {self.written} {action}, {self.duplicates} duplicate, "
+                f"{self.rejected} invalid; {self.hashed} hashed ({self.read / elapsed:.0f} records/s)")
+        print(f"{line} in {elapsed:.1f}s" if final else line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import users from CSV or NDJSON")
+    parser.add_argument("path", help="input file, or - for stdin")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default=None,
+                        help="defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--on-duplicate", choices=["skip", "update"], default="skip")
+    parser.add_argument("--database-url", default=Config.SQLALCHEMY_DATABASE_URI)
+    parser.add_argument("--dry-run", action="store_true", help="validate and hash without writing")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    stream = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8") if args.path == "-" else open(args.path, encoding="utf-8", newline="")
+    engine = create_engine(args.database_url)
+    if args.dry_run:
+        # A dry run never changes the target database, schema included
+        if not inspect(engine).has_table(users_table.name):
+            sys.exit(f"Dry run: table {users_table.name} does not exist in {engine.url.render_as_string()}")
+    else:
+        metadata.create_all(engine)
+    with stream, ProcessPoolExecutor(max_workers=args.workers) as pool:
+        importer = Importer(engine, pool, args.workers, Config.PASSWORD_HASH_METHOD, args.batch_size, args.on_duplicate, args.dry_run)
+        importer.run(read_records(stream, fmt))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import os
+import numpy as np
+
+# Vocabularies used to parse catalog file names like "Navy Blue Velvet Blazer.jpg".
+# Multi-word entries come first so "Navy Blue" wins over "Blue".
+COLORS = [
+    "Mustard Yellow", "Olive Green", "Navy Blue", "Dark Grey", "Sky Blue",
+    "Burgundy", "Maroon", "Khaki", "Beige", "Black", "White", "Grey", "Blue",
+]
+GARMENTS = [
+    "Formal Shirt", "T-Shirt", "Tracksuit", "Sweater", "Hoodie", "Jacket",
+    "Blazer", "Kurta", "Jeans", "Shorts",
+]
+MATERIALS = ["Cotton", "Linen", "Velvet", "Leather"]
+FITS = ["Slim Fit", "Straight Fit", "Regular Fit", "Crew Neck", "V-Neck", "Zip-Up", "Pullover", "Cargo", "Chino", "Bomber", "Polo"]
+BRANDS = ["Adidas", "Nike"]
+
+# Where each garment goes in an outfit
+SLOTS = {
+    "T-Shirt": "top", "Formal Shirt": "top", "Kurta": "top", "Sweater": "top", "Hoodie": "top",
+    "Jeans": "bottom", "Shorts": "bottom",
+    "Jacket": "layer", "Blazer": "layer",
+    "Tracksuit": "full",
+}
+
+# Style affinity of each attribute value; an item's style vector is the sum over its attributes
+ATTRIBUTE_STYLES = {
+    "T-Shirt": {"Casual": 1.0, "Streetwear": 0.6, "Minimalist": 0.5, "Trendy": 0.3},
+    "Formal Shirt": {"Formal": 1.0, "Professional": 1.0, "Business Casual": 0.7, "Classic": 0.6},
+    "Kurta": {"Classic": 0.8, "Casual": 0.5, "Vintage": 0.4, "Contemporary": 0.4},
+    "Sweater": {"Classic": 0.8, "Business Casual": 0.6, "Casual": 0.5, "Minimalist": 0.4},
+    "Hoodie": {"Streetwear": 1.0, "Casual": 0.8, "Urban": 0.7, "Athleisure": 0.5},
+    "Jeans": {"Casual": 0.8, "Streetwear": 0.5, "Urban": 0.5, "Contemporary": 0.4, "Business Casual": 0.3},
+    "Shorts": {"Casual": 1.0, "Athleisure": 0.4, "Streetwear": 0.3},
+    "Jacket": {"Urban": 0.8, "Streetwear": 0.6, "Trendy": 0.6, "Contemporary": 0.5},
+    "Blazer": {"Formal": 1.0, "Professional": 0.9, "Classic": 0.7, "Business Casual": 0.6},
+    "Tracksuit": {"Athleisure": 1.0, "Streetwear": 0.6, "Casual": 0.4},
+    "Cotton": {"Casual": 0.3, "Minimalist": 0.2},
+    "Linen": {"Classic": 0.3, "Minimalist": 0.3},
+    "Velvet": {"Trendy": 0.6, "Vintage": 0.5, "Formal": 0.3},
+    "Leather": {"Urban": 0.5, "Trendy": 0.4, "Vintage": 0.3},
+    "Slim Fit": {"Contemporary": 0.4, "Trendy": 0.3, "Professional": 0.2},
+    "Straight Fit": {"Classic": 0.3, "Casual": 0.2},
+    "Regular Fit": {"Classic": 0.3, "Business Casual": 0.2},
+    "Crew Neck": {"Minimalist": 0.3, "Classic": 0.2},
+    "V-Neck": {"Contemporary": 0.3, "Business Casual": 0.2},
+    "Zip-Up": {"Athleisure": 0.3, "Streetwear": 0.2},
+    "Pullover": {"Casual": 0.3, "Streetwear": 0.2},
+    "Cargo": {"Streetwear": 0.4, "Urban": 0.4},
+    "Chino": {"Business Casual": 0.4, "Classic": 0.3},
+    "Bomber": {"Streetwear": 0.4, "Urban": 0.4, "Trendy": 0.3},
+    "Polo": {"Business Casual": 0.4, "Classic": 0.3, "Casual": 0.2},
+    "Adidas": {"Athleisure": 0.4, "Streetwear": 0.3},
+    "Nike": {"Athleisure": 0.4, "Streetwear": 0.3},
+    "Black": {"Minimalist": 0.4, "Urban": 0.3, "Formal": 0.2},
+    "White": {"Minimalist": 0.4, "Classic": 0.3},
+    "Grey": {"Minimalist": 0.3, "Contemporary": 0.2},
+    "Dark Grey": {"Minimalist": 0.3, "Professional": 0.2},
+    "Navy Blue": {"Classic": 0.3, "Professional": 0.3},
+    "Sky Blue": {"Business Casual": 0.3, "Professional": 0.2},
+    "Blue": {"Casual": 0.2},
+    "Beige": {"Minimalist": 0.3, "Classic": 0.2},
+    "Khaki": {"Classic": 0.2, "Casual": 0.2},
+    "Burgundy": {"Trendy": 0.3, "Vintage": 0.3},
+    "Maroon": {"Vintage": 0.3, "Classic": 0.2},
+    "Olive Green": {"Urban": 0.3, "Streetwear": 0.2},
+    "Mustard Yellow": {"Trendy": 0.5, "Vintage": 0.3},
+}
+
+# Colors that go with anything; other pairs score by an explicit list below
+NEUTRALS = {"Black", "White", "Grey", "Dark Grey", "Beige", "Khaki", "Navy Blue"}
+COLOR_PAIRS = {
+    frozenset(pair) for pair in [
+        ("Sky Blue", "Blue"), ("Burgundy", "Blue"), ("Maroon", "Blue"), ("Olive Green", "Blue"),
+        ("Mustard Yellow", "Blue"), ("Olive Green", "Mustard Yellow"), ("Sky Blue", "Burgundy"),
+    ]
+}
+
+
+def parse_item(filename: str):
+    """Split a catalog file name into its attributes; returns None for unknown garments"""
+    name = os.path.splitext(filename)[0]
+    color = next((c for c in COLORS if name.startswith(c + " ")), None)
+    garment = next((g for g in GARMENTS if name.endswith(" " + g) or name == g), None)
+    if garment is None:
+        return None
+    middle = name[len(color) if color else 0:len(name) - len(garment)].strip()
+    return {
+        "name": name,
+        "image": f"/cloths/{filename}",
+        "color": color,
+        "garment": garment,
+        "slot": SLOTS[garment],
+        "material": next((m for m in MATERIALS if m in middle), None),
+        "fit": next((f for f in FITS if f in middle), None),
+        "brand": next((b for b in BRANDS if b in middle), None),
+    }
+
+
+class Catalog:
+    """Parsed catalog with inverted attribute indexes and a precomputed item x style matrix"""
+
+    INDEXED_ATTRIBUTES = ("color", "garment", "slot", "material", "fit", "brand")
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        files = sorted(f for f in os.listdir(directory) if f.lower().endswith((".jpg", ".jpeg", ".png", ".webp")))
+        self.items = [item for item in (parse_item(f) for f in files) if item is not None]
+        for item_id, item in enumerate(self.items):
+            item["id"] = item_id
+
+        # attribute -> value -> sorted item ids
+        self.index = {attribute: {} for attribute in self.INDEXED_ATTRIBUTES}
+        for item in self.items:
+            for attribute in self.INDEXED_ATTRIBUTES:
+                if item[attribute] is not None:
+                    self.index[attribute].setdefault(item[attribute], []).append(item["id"])
+
+        self.styles = sorted({style for weights in ATTRIBUTE_STYLES.values() for style in weights})
+        self.style_column = {style: column for column, style in enumerate(self.styles)}
+        self.style_matrix = np.zeros((len(self.items), len(self.styles)), dtype=np.float32)
+        for item in self.items:
+            for attribute in ("garment", "color", "material", "fit", "brand"):
+                for style, weight in ATTRIBUTE_STYLES.get(item[attribute], {}).items():
+                    self.style_matrix[item["id"], self.style_column[style]] += weight
+        norms = np.linalg.norm(self.style_matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        self.style_matrix /= norms
+
+        self.slot_ids = {slot: np.array(self.index["slot"].get(slot, []), dtype=np.int64) for slot in set(SLOTS.values())}
+
+        # color x color harmony plus one color id per item, so outfit scoring is array indexing
+        # and memory grows with the palette, not the catalog. The last id stands for "no color".
+        colors = sorted({item["color"] for item in self.items if item["color"] is not None})
+        color_id = {color: index for index, color in enumerate(colors)}
+        self.color_ids = np.array([color_id.get(item["color"], len(colors)) for item in self.items], dtype=np.int64)
+        self.color_harmony = np.zeros((len(colors) + 1, len(colors) + 1), dtype=np.float32)
+        for i, a in enumerate(colors):
+            for j, b in enumerate(colors):
+                if a != b and (a in NEUTRALS or b in NEUTRALS or frozenset((a, b)) in COLOR_PAIRS):
+                    self.color_harmony[i, j] = 1.0
+                elif a == b and a in NEUTRALS:
+                    self.color_harmony[i, j] = 0.5
+
+    def harmony(self, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        """len(first) x len(second) color harmony between two sets of item ids"""
+        return self.color_harmony[self.color_ids[first]][:, self.color_ids[second]]
+
+    def find(self, **filters) -> list:
+        """Items matching every given attribute value, via inverted index intersection"""
+        ids = None
+        for attribute, value in filters.items():
+            if value is None:
+                continue
+            matches = set(self.index.get(attribute, {}).get(value, []))
+            ids = matches if ids is None else ids & matches
+        if ids is None:
+            return list(self.items)
+        return [self.items[item_id] for item_id in sorted(ids)]
+
+    def profile_vector(self, profile) -> np.ndarray:
+        # profile: iterable of (style_name, percentage); styles the catalog doesn't know are ignored
+        vector = np.zeros(len(self.styles), dtype=np.float32)
+        for style_name, percentage in profile:
+            column = self.style_column.get(style_name)
+            if column is not None:
+                vector[column] = percentage
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def score_items(self, profile) -> np.ndarray:
+        return self.style_matrix @ self.profile_vector(profile)
+
+    def recommend(self, profile, limit: int = 10, harmony_weight: float = 0.15) -> dict:
+        """Rank single items and top + bottom (+ optional layer) outfits for a style profile"""
+        scores = self.score_items(profile)
+        ranked_items = np.argsort(-scores)[:limit]
+
+        tops, bottoms, layers, full = (self.slot_ids[slot] for slot in ("top", "bottom", "layer", "full"))
+        outfits = []
+        if len(tops) and len(bottoms):
+            # Score every top x bottom x (no layer | layer) combination at once
+            base = (scores[tops][:, None] + scores[bottoms][None, :]) / 2
+            base += harmony_weight * self.harmony(tops, bottoms)
+            layer_scores = np.full(len(layers) + 1, 0.0, dtype=np.float32)
+            layer_harmony = np.zeros((len(tops), len(bottoms), len(layers) + 1), dtype=np.float32)
+            if len(layers):
+                layer_scores[1:] = scores[layers] - scores.mean()
+                layer_harmony[:, :, 1:] = (
+                    self.harmony(tops, layers)[:, None, :] + self.harmony(bottoms, layers)[None, :, :]
+                ) / 2
+            combined = base[:, :, None] + 0.5 * layer_scores[None, None, :] + harmony_weight * layer_harmony
+            flat = combined.ravel()
+            count = min(limit, flat.size)
+            best = np.argpartition(-flat, count - 1)[:count]
+            best = best[np.argsort(-flat[best])]
+            for position in best:
+                t, b, l = np.unravel_index(position, combined.shape)
+                items = [int(tops[t]), int(bottoms[b])] + ([int(layers[l - 1])] if l else [])
+                outfits.append({"items": items, "score": float(flat[position])})
+        for item_id in full:
+            outfits.append({"items": [int(item_id)], "score": float(scores[item_id])})
+        outfits.sort(key=lambda outfit: outfit["score"], reverse=True)
+
+        return {
+            "items": [
+                dict(self.items[item_id], score=round(float(scores[item_id]), 4)) for item_id in ranked_items
+            ],
+            "outfits": [
+                {"items": [self.items[i] for i in outfit["items"]], "score": round(outfit["score"], 4)}
+                for outfit in outfits[:limit]
+            ],
+        }
@@ -0,0 +1,155 @@
+"""Pre-generate resized WebP/AVIF variants of the catalog images.
+
+Only new or changed source files are processed, spread across all cores.
+A manifest.json next to the variants records dimensions and content hashes;
+the service uses it to pick a variant and as the ETag source.
+
+    python image_variants.py [--widths 160,320,640,1024] [--force]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, features
+
+CATALOG_DIR = os.getenv(
+    "CATALOG_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "frontend", "public", "cloths")
+)
+VARIANTS_DIR = os.getenv("VARIANTS_DIR", os.path.join(CATALOG_DIR, "variants"))
+MANIFEST_NAME = "manifest.json"
+DEFAULT_WIDTHS = [160, 320, 640, 1024]
+SOURCE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+# Encoder settings per output format; AVIF is skipped when Pillow was built without it
+FORMATS = {
+    "avif": {"quality": 55},
+    "webp": {"quality": 80, "method": 6},
+}
+
+
+def available_formats() -> list:
+    return [name for name in FORMATS if features.check(name)]
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def slugify(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", os.path.splitext(name)[0].lower()).strip("-")
+
+
+def build_variants(source_path: str, output_dir: str, widths: list, formats: list) -> dict:
+    """Encode every width x format variant of one image; runs in a worker process"""
+    source_name = os.path.basename(source_path)
+    slug = slugify(source_name)
+    entry = {
+        "source_hash": file_hash(source_path),
+        "source_mtime": os.path.getmtime(source_path),
+        "source_size": os.path.getsize(source_path),
+        "variants": [],
+    }
+    with Image.open(source_path) as image:
+        image = image.convert("RGB")
+        entry["width"], entry["height"] = image.size
+        # Never upscale; the original width stands in when it is below every target
+        targets = sorted({w for w in widths if w < image.width} or {image.width})
+        for width in targets:
+            height = max(1, round(image.height * width / image.width))
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                filename = f"{slug}-{width}.{fmt}"
+                path = os.path.join(output_dir, filename)
+                resized.save(path, fmt.upper(), **FORMATS[fmt])
+                entry["variants"].append({
+                    "file": filename,
+                    "format": fmt,
+                    "width": width,
+                    "height": height,
+                    "bytes": os.path.getsize(path),
+                    "hash": file_hash(path),
+                })
+    return {source_name: entry}
+
+
+def is_current(entry: dict, source_path: str, output_dir: str, widths: list, formats: list) -> bool:
+    if not entry:
+        return False
+    # Cheap stat check first; only hash when the file looks touched
+    if entry.get("source_size") != os.path.getsize(source_path):
+        return False
+    if entry.get("source_mtime") != os.path.getmtime(source_path) and entry.get("source_hash") != file_hash(source_path):
+        return False
+    built = {(v["width"], v["format"]) for v in entry["variants"]}
+    wanted_widths = {w for w in widths if w < entry["width"]} or {entry["width"]}
+    if built != {(w, f) for w in wanted_widths for f in formats}:
+        return False
+    return all(os.path.exists(os.path.join(output_dir, v["file"])) for v in entry["variants"])
+
+
+def load_manifest(output_dir: str = VARIANTS_DIR) -> dict:
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def build_all(source_dir: str, output_dir: str, widths: list, force: bool = False, workers: int = None) -> dict:
+    os.makedirs(output_dir, exist_ok=True)
+    formats = available_formats()
+    manifest = {} if force else load_manifest(output_dir)
+    sources = sorted(f for f in os.listdir(source_dir) if f.lower().endswith(SOURCE_EXTENSIONS))
+
+    changed = []
+    for name in sources:
+        source_path = os.path.join(source_dir, name)
+        if is_current(manifest.get(name), source_path, output_dir, widths, formats):
+            # Touched but identical: remember the new mtime so the next run skips hashing
+            manifest[name]["source_mtime"] = os.path.getmtime(source_path)
+        else:
+            changed.append(name)
+    started = time.monotonic()
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [
+            pool.submit(build_variants, os.path.join(source_dir, name), output_dir, widths, formats)
+            for name in changed
+        ]
+        for future in futures:
+            manifest.update(future.result())
+
+    # Drop variants whose source image is gone
+    for name in set(manifest) - set(sources):
+        for variant in manifest.pop(name)["variants"]:
+            path = os.path.join(output_dir, variant["file"])
+            if os.path.exists(path):
+                os.remove(path)
+
+    # Write atomically so a running service never reads a half-written manifest
+    temp_path = os.path.join(output_dir, MANIFEST_NAME + ".tmp")
+    with open(temp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, os.path.join(output_dir, MANIFEST_NAME))
+
+    print(f"Built variants for {len(changed)} of {len(sources)} images "
+          f"({', '.join(formats)}) in {time.monotonic() - started:.1f}s")
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build responsive catalog image variants")
+    parser.add_argument("--source", default=CATALOG_DIR)
+    parser.add_argument("--output", default=VARIANTS_DIR)
+    parser.add_argument("--widths", default=",".join(str(w) for w in DEFAULT_WIDTHS))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="rebuild every image")
+    args = parser.parse_args()
+    build_all(args.source, args.output, [int(w) for w in args.widths.split(",")], args.force, args.workers)
@@ -0,0 +1,220 @@
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import FileResponse, Response
+from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel
+from typing import List, Optional
+from functools import lru_cache
+import uvicorn
+import os
+import httpx
+from urllib.parse import quote
+from dotenv import load_dotenv
+from catalog import Catalog
+from image_variants import VARIANTS_DIR, MANIFEST_NAME, load_manifest
+from fashion_common.instrumentation import instrument_fastapi
+
+# Load environment variables
+load_dotenv()
+
+# Catalog images shared with the frontend
+CATALOG_DIR = os.getenv(
+    "CATALOG_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "frontend", "public", "cloths")
+)
+STYLE_SERVICE_URL = os.getenv("STYLE_SERVICE_URL", "http://localhost:5001")
+RECOMMENDATION_CACHE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "4096"))
+
+# Catalog responses link images as /api/catalog/images/<file>?v=<source hash>, so a replaced
+# image gets a new URL and versioned URLs can be cached for a year. Bare or outdated URLs
+# are revalidated on every use instead; unchanged images cost a 304 on the ETag.
+VERSIONED_CACHE_CONTROL = "public, max-age=31536000, immutable"
+UNVERSIONED_CACHE_CONTROL = "public, no-cache"
+IMAGE_VERSION_LENGTH = 16
+VARIANT_MEDIA_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+
+# Initialize FastAPI app
+app = FastAPI(title="Outfit Recommendation Service")
+
+# Configure CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["http://localhost:3000"],  # Frontend URL
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Prometheus /metrics with per-route latency
+instrument_fastapi(app)
+
+# Parsed and indexed once per process
+catalog = Catalog(CATALOG_DIR)
+print(f"Indexed {len(catalog.items)} catalog items from {CATALOG_DIR}")
+
+style_client = httpx.AsyncClient(base_url=STYLE_SERVICE_URL, timeout=5.0)
+
+class StylePreference(BaseModel):
+    style_name: str
+    percentage: int
+
+class ProfileRecommendation(BaseModel):
+    preferences: List[StylePreference]
+    limit: int = 10
+
+def profile_version(preferences) -> tuple:
+    # The profile's content is its version: any edit yields a new memo key
+    return tuple(sorted((pref["style_name"], pref["percentage"]) for pref in preferences))
+
+@lru_cache(maxsize=RECOMMENDATION_CACHE_SIZE)
+def recommend_for_profile(profile: tuple, limit: int) -> dict:
+    return catalog.recommend(profile, limit)
+
+async def fetch_profile(user_id: int) -> list:
+    try:
+        response = await style_client.get(f"/api/users/{user_id}/styles")
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError as e:
+        print(f"Error fetching style profile for user {user_id}: {str(e)}")
+        raise HTTPException(status_code=502, detail="Style service unavailable")
+
+# Reloaded whenever image_variants.py rewrites the manifest
+variant_manifest = {"mtime": None, "entries": {}}
+
+def current_manifest() -> dict:
+    try:
+        mtime = os.path.getmtime(os.path.join(VARIANTS_DIR, MANIFEST_NAME))
+    except FileNotFoundError:
+        return {}
+    if mtime != variant_manifest["mtime"]:
+        variant_manifest["entries"] = load_manifest(VARIANTS_DIR)
+        variant_manifest["mtime"] = mtime
+    return variant_manifest["entries"]
+
+def image_version(entry: dict) -> str:
+    return entry["source_hash"][:IMAGE_VERSION_LENGTH]
+
+def image_url(item: dict) -> str:
+    filename = os.path.basename(item["image"])
+    url = f"/api/catalog/images/{quote(filename)}"
+    entry = current_manifest().get(filename)
+    return f"{url}?v={image_version(entry)}" if entry else url
+
+def with_image_urls(items: list) -> list:
+    # Added per response, not in the memoized results, so a rebuilt manifest shows up immediately
+    return [dict(item, image_url=image_url(item)) for item in items]
+
+def link_images(recommendations: dict) -> dict:
+    return {
+        "items": with_image_urls(recommendations["items"]),
+        "outfits": [dict(outfit, items=with_image_urls(outfit["items"])) for outfit in recommendations["outfits"]],
+    }
+
+def pick_variant(entry: dict, width: Optional[int], format: Optional[str], accept: str):
+    formats = {variant["format"] for variant in entry["variants"]}
+    if format is None:
+        # Best format the client says it accepts
+        format = next((f for f in ("avif", "webp") if f in formats and VARIANT_MEDIA_TYPES[f] in accept), None)
+    if format is None or format not in formats:
+        return None
+    candidates = sorted((v for v in entry["variants"] if v["format"] == format), key=lambda v: v["width"])
+    if width is None:
+        return candidates[-1]
+    # Smallest variant at least as wide as requested, else the largest there is
+    return next((v for v in candidates if v["width"] >= width), candidates[-1])
+
+@app.on_event("shutdown")
+async def close_style_client():
+    await style_client.aclose()
+
+@app.get("/")
+def read_root():
+    return {"message": "Outfit Recommendation Service is running"}
+
+@app.get("/api/users/{user_id}/recommendations")
+async def get_recommendations(user_id: int, limit: int = Query(10, ge=1, le=50)):
+    """Ranked items and outfits for a user's style profile from the style service"""
+    preferences = await fetch_profile(user_id)
+    return link_images(recommend_for_profile(profile_version(preferences), limit))
+
+@app.post("/api/recommendations")
+def get_profile_recommendations(request: ProfileRecommendation):
+    """Ranked items and outfits for an explicit style profile"""
+    if not 1 <= request.limit <= 50:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 50")
+    preferences = [pref.model_dump() for pref in request.preferences]
+    return link_images(recommend_for_profile(profile_version(preferences), request.limit))
+
+@app.get("/api/catalog")
+def get_catalog(
+    color: Optional[str] = None,
+    garment: Optional[str] = None,
+    slot: Optional[str] = None,
+    material: Optional[str] = None,
+    fit: Optional[str] = None,
+    brand: Optional[str] = None
+):
+    """Catalog items filtered by attribute through the inverted indexes"""
+    return with_image_urls(catalog.find(color=color, garment=garment, slot=slot, material=material, fit=fit, brand=brand))
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match is "*" or a comma-separated list of entity tags, compared weakly
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
+
+@app.get("/api/catalog/images/{filename}")
+def get_catalog_image(
+    filename: str,
+    request: Request,
+    width: Optional[int] = Query(None, ge=1),
+    format: Optional[str] = Query(None, pattern="^(avif|webp|original)$"),
+    v: Optional[str] = None
+):
+    """Serve the closest pre-built variant of a catalog image; v is the version from image_url"""
+    entry = current_manifest().get(filename)
+    variant = None
+    if entry and format != "original":
+        variant = pick_variant(entry, width, format, request.headers.get("accept", ""))
+
+    if variant is not None:
+        path = os.path.join(VARIANTS_DIR, variant["file"])
+        etag = f'"{variant["hash"]}"'
+        media_type = VARIANT_MEDIA_TYPES[variant["format"]]
+    else:
+        if os.path.basename(filename) != filename or not os.path.isfile(os.path.join(CATALOG_DIR, filename)):
+            raise HTTPException(status_code=404, detail="Image not found")
+        path = os.path.join(CATALOG_DIR, filename)
+        etag = f'"{entry["source_hash"]}"' if entry else None
+        media_type = None
+
+    headers = {"Vary": "Accept"}
+    if etag:
+        headers["ETag"] = etag
+        versioned = entry is not None and v == image_version(entry)
+        headers["Cache-Control"] = VERSIONED_CACHE_CONTROL if versioned else UNVERSIONED_CACHE_CONTROL
+        if etag_matches(request.headers.get("if-none-match", ""), etag):
+            return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+@app.get("/api/catalog/facets")
+def get_catalog_facets():
+    """Attribute values and their item counts"""
+    return {
+        attribute: {value: len(ids) for value, ids in values.items()}
+        for attribute, values in catalog.index.items()
+    }
+
+@app.get("/api/recommendations/cache/stats")
+def get_cache_stats():
+    info = recommend_for_profile.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "size": info.currsize,
+        "max_size": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_rate": info.hits / lookups if lookups else 0.0,
+    }
+
+if __name__ == "__main__":
+    uvicorn.run("main:app", host="0.0.0.0", port=5002, reload=True)
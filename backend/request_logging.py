@@ -0,0 +1,129 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import time
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, request
+
+access_logger = logging.getLogger("access")
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the writer falls behind"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The stock prepare() folds the traceback into msg and drops exc_info; keep them apart
+        # so JsonFormatter can still emit "exception" as its own field
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+def setup_logging(level: str = "INFO", queue_size: int = 10000) -> DroppingQueueHandler:
+    """Route all logging through a bounded queue drained by a background thread"""
+    log_queue = queue.Queue(maxsize=queue_size)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(JsonFormatter())
+    listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    handler = DroppingQueueHandler(log_queue)
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+    return handler
+
+
+def parse_sample_rates(spec: str) -> dict:
+    # "default=0.1,/api/users/login=1" -> {"default": 0.1, "/api/users/login": 1.0}
+    rates = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        route, _, rate = part.rpartition("=")
+        rates[route or "default"] = float(rate)
+    return rates
+
+
+def truncate(data: bytes, limit: int) -> str:
+    text = data[:limit].decode("utf-8", errors="replace")
+    return text + f"...[{len(data) - limit} bytes truncated]" if len(data) > limit else text
+
+
+def init_request_logging(app):
+    """One structured access record per sampled request; bodies only when asked for"""
+    if not app.config["REQUEST_LOG_ENABLED"]:
+        return
+
+    rates = parse_sample_rates(app.config["REQUEST_LOG_SAMPLE_RATES"])
+    default_rate = rates.get("default", 0.0)
+    log_bodies = app.config["REQUEST_LOG_BODIES"]
+    body_limit = app.config["REQUEST_LOG_BODY_MAX_BYTES"]
+    body_excluded = set(app.config["REQUEST_LOG_BODY_EXCLUDE"])
+
+    @app.before_request
+    def start_request_log():
+        route = request.url_rule.rule if request.url_rule else request.path
+        rate = rates.get(route, default_rate)
+        g.request_log_sampled = rate >= 1 or (rate > 0 and random.random() < rate)
+        g.request_log_started = time.perf_counter()
+
+    @app.after_request
+    def write_request_log(response):
+        started = getattr(g, "request_log_started", None)
+        if started is None:
+            return response
+        # Server errors are always recorded, whatever the sample rate
+        if not g.request_log_sampled and response.status_code < 500:
+            return response
+
+        fields = {
+            "method": request.method,
+            "path": request.path,
+            "route": request.url_rule.rule if request.url_rule else None,
+            "status": response.status_code,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            "response_bytes": response.calculate_content_length(),
+        }
+        if log_bodies and fields["route"] not in body_excluded:
+            # Multipart uploads are never copied into the log
+            if request.mimetype != "multipart/form-data":
+                fields["request_body"] = truncate(request.get_data(cache=True), body_limit)
+            if not response.direct_passthrough and not response.is_streamed:
+                fields["response_body"] = truncate(response.get_data(), body_limit)
+        access_logger.info("request", extra={"fields": fields})
+        return response
@@ -0,0 +1,156 @@
+import os
+import threading
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, Column, Integer, SmallInteger, String, Float, ForeignKey, Index, select, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker, Session
+
+# Load environment variables
+load_dotenv()
+
+# Database configuration
+DB_HOST = os.getenv("DB_HOST", "localhost")
+DB_USER = os.getenv("DB_USER", "root")
+DB_PASSWORD = os.getenv("DB_PASSWORD", "root")
+DB_NAME = os.getenv("DB_NAME", "fashion_ai")
+
+# Connection pool settings for the service's async engine
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Recycle below MySQL's wait_timeout so the server never closes a pooled connection first
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Sync engine for schema management and the migrate_styles.py CLI
+DATABASE_URL = os.getenv("DATABASE_URL", f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}")
+engine = create_engine(DATABASE_URL, pool_recycle=DB_POOL_RECYCLE, pool_pre_ping=DB_POOL_PRE_PING)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine used by the API; requests wait on connections rather than on worker threads
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}")
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+Base = declarative_base()
+
+# SQLite only auto-increments INTEGER primary keys
+StyleIdType = SmallInteger().with_variant(Integer, "sqlite")
+
+# Define models
+class StylePreferenceModel(Base):
+    """Legacy wide layout; kept readable until migrate_styles.py has converted it"""
+    __tablename__ = "style_profiles"
+
+    profile_id = Column(Integer, primary_key=True, name="profile_id")
+    user_id = Column(Integer, nullable=False, name="user_id")
+    style_1 = Column(String(100), nullable=True, name="style_1")
+    style_1_percentage = Column(Float, nullable=True, name="style_1_percentage")
+    style_2 = Column(String(100), nullable=True, name="style_2")
+    style_2_percentage = Column(Float, nullable=True, name="style_2_percentage")
+    style_3 = Column(String(100), nullable=True, name="style_3")
+    style_3_percentage = Column(Float, nullable=True, name="style_3_percentage")
+    style_4 = Column(String(100), nullable=True, name="style_4")
+    style_4_percentage = Column(Float, nullable=True, name="style_4_percentage")
+
+    class Config:
+        orm_mode = True
+
+class StyleNameModel(Base):
+    """Dictionary of style names so user rows store a small integer id"""
+    __tablename__ = "style_names"
+
+    style_id = Column(StyleIdType, primary_key=True, autoincrement=True)
+    name = Column(String(100), nullable=False, unique=True)
+
+class UserStyleModel(Base):
+    """One row per (user, style); the primary key clusters a user's styles together"""
+    __tablename__ = "user_styles"
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    style_id = Column(StyleIdType, ForeignKey("style_names.style_id"), primary_key=True, autoincrement=False)
+    percentage = Column(SmallInteger, nullable=False)
+
+    __table_args__ = (
+        # Serves per-style lookups and aggregates without touching the user index
+        Index("ix_user_styles_style_percentage", "style_id", "percentage"),
+    )
+
+# (name, percentage) column pairs of a legacy style_profiles row
+STYLE_COLUMNS = [
+    ("style_1", "style_1_percentage"),
+    ("style_2", "style_2_percentage"),
+    ("style_3", "style_3_percentage"),
+    ("style_4", "style_4_percentage"),
+]
+
+# Style names never change once assigned, so their ids are cached for the process lifetime
+_style_ids = {}
+_style_names = {}
+_style_lock = threading.Lock()
+
+def _uncached_style_names(names: set) -> list:
+    with _style_lock:
+        return [name for name in names if name not in _style_ids]
+
+def _remember_style_ids(found: dict):
+    with _style_lock:
+        _style_ids.update(found)
+        _style_names.update({style_id: name for name, style_id in found.items()})
+
+def _cached_style_ids(names: set) -> dict:
+    with _style_lock:
+        return {name: _style_ids[name] for name in names}
+
+def _select_style_ids(names):
+    return select(StyleNameModel.style_id, StyleNameModel.name).where(StyleNameModel.name.in_(names))
+
+# Committed on its own so a rolled-back caller can't leave cached ids pointing nowhere;
+# IGNORE lets a concurrent writer win the race for the same name
+_INSERT_STYLE_NAMES = insert(StyleNameModel).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite")
+
+def style_ids_for(db: Session, names) -> dict:
+    """Map style names to ids, creating dictionary rows for names not seen before"""
+    names = set(names)
+    missing = _uncached_style_names(names)
+    if missing:
+        found = {row.name: row.style_id for row in db.execute(_select_style_ids(missing))}
+        new_names = [name for name in missing if name not in found]
+        if new_names:
+            with engine.begin() as conn:
+                conn.execute(_INSERT_STYLE_NAMES, [{"name": name} for name in new_names])
+                found.update({row.name: row.style_id for row in conn.execute(_select_style_ids(new_names))})
+        _remember_style_ids(found)
+    return _cached_style_ids(names)
+
+async def async_style_ids_for(db: AsyncSession, names) -> dict:
+    """style_ids_for for the async API"""
+    names = set(names)
+    missing = _uncached_style_names(names)
+    if missing:
+        found = {row.name: row.style_id for row in await db.execute(_select_style_ids(missing))}
+        new_names = [name for name in missing if name not in found]
+        if new_names:
+            async with async_engine.begin() as conn:
+                await conn.execute(_INSERT_STYLE_NAMES, [{"name": name} for name in new_names])
+                found.update({row.name: row.style_id for row in await conn.execute(_select_style_ids(new_names))})
+        _remember_style_ids(found)
+    return _cached_style_ids(names)
+
+def style_name_for(db: Session, style_id: int) -> str:
+    with _style_lock:
+        name = _style_names.get(style_id)
+    if name is None:
+        name = db.execute(select(StyleNameModel.name).where(StyleNameModel.style_id == style_id)).scalar()
+        if name is not None:
+            with _style_lock:
+                _style_names[style_id] = name
+                _style_ids[name] = style_id
+    return name
@@ -0,0 +1,28 @@
+"""Seed style profiles, and the template served to users without any styles"""
+
+DEFAULT_PROFILES = {
+    1: [
+        {"style_name": "Casual", "percentage": 40},
+        {"style_name": "Contemporary", "percentage": 30},
+        {"style_name": "Minimalist", "percentage": 20},
+        {"style_name": "Streetwear", "percentage": 10}
+    ],
+    2: [
+        {"style_name": "Professional", "percentage": 45},
+        {"style_name": "Classic", "percentage": 25},
+        {"style_name": "Formal", "percentage": 20},
+        {"style_name": "Business Casual", "percentage": 10}
+    ],
+    3: [
+        {"style_name": "Streetwear", "percentage": 35},
+        {"style_name": "Urban", "percentage": 30},
+        {"style_name": "Athleisure", "percentage": 20},
+        {"style_name": "Vintage", "percentage": 15}
+    ],
+    "default": [
+        {"style_name": "Casual", "percentage": 35},
+        {"style_name": "Minimalist", "percentage": 25},
+        {"style_name": "Classic", "percentage": 25},
+        {"style_name": "Trendy", "percentage": 15}
+    ]
+}
@@ -0,0 +1,10 @@
+#!/bin/sh
+set -e
+
+# The service no longer creates its schema or seed data on startup; init_db.py is
+# idempotent, so every container runs it first unless a separate init job owns it
+if [ "${INIT_DB:-true}" = "true" ]; then
+    python init_db.py
+fi
+
+exec "$@"
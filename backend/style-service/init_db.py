@@ -0,0 +1,48 @@
+"""One-shot database setup for the style service: tables, then default profiles.
+
+Run it once per deploy (or as an init job) before starting replicas; the
+service itself no longer creates tables or seeds data on startup.
+
+    python init_db.py [--skip-seed]
+"""
+import argparse
+import time
+from sqlalchemy import select, insert
+from database import engine, SessionLocal, Base, UserStyleModel, style_ids_for
+from defaults import DEFAULT_PROFILES
+
+def seed_default_profiles() -> int:
+    """Insert the default profiles in one transaction if user_styles is empty"""
+    db = SessionLocal()
+    try:
+        if db.execute(select(UserStyleModel.user_id).limit(1)).first():
+            return 0
+        profiles = {user_id: prefs for user_id, prefs in DEFAULT_PROFILES.items() if user_id != "default"}
+        style_ids = style_ids_for(db, (pref["style_name"] for prefs in profiles.values() for pref in prefs))
+        db.execute(insert(UserStyleModel), [
+            {"user_id": user_id, "style_id": style_ids[pref["style_name"]], "percentage": pref["percentage"]}
+            for user_id, prefs in profiles.items()
+            for pref in prefs
+        ])
+        db.commit()
+        return len(profiles)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def init_db(seed: bool):
+    started = time.monotonic()
+    Base.metadata.create_all(bind=engine)
+    print(f"Schema ready in {time.monotonic() - started:.2f}s")
+    if seed:
+        seeded = seed_default_profiles()
+        print(f"Seeded {seeded} default profiles" if seeded else "user_styles already populated; skipping seed")
+    print(f"Database initialized in {time.monotonic() - started:.2f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the style service schema and seed default profiles")
+    parser.add_argument("--skip-seed", action="store_true", help="only create tables")
+    args = parser.parse_args()
+    init_db(not args.skip_seed)
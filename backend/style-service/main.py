@@ -1,67 +1,71 @@
-from fastapi import FastAPI, HTTPException, Depends
+import time
+BOOT_STARTED = time.monotonic()
+
+from fastapi import FastAPI, HTTPException, Depends, Path, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 import uvicorn
 import os
-from dotenv import load_dotenv
-from sqlalchemy import create_engine, Column, Integer, String, Float, MetaData, Table, select, insert, update, delete, text
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
-
-# Load environment variables
-load_dotenv()
-
-# Database configuration
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_USER = os.getenv("DB_USER", "root")
-DB_PASSWORD = os.getenv("DB_PASSWORD", "root")
-DB_NAME = os.getenv("DB_NAME", "fashion_ai")
-
-# Create SQLAlchemy engine
-DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
-
-# Define models
-class StylePreferenceModel(Base):
-    __tablename__ = "style_profiles"
-    
-    profile_id = Column(Integer, primary_key=True, name="profile_id")
-    user_id = Column(Integer, nullable=False, name="user_id")
-    style_1 = Column(String(100), nullable=True, name="style_1")
-    style_1_percentage = Column(Float, nullable=True, name="style_1_percentage")
-    style_2 = Column(String(100), nullable=True, name="style_2")
-    style_2_percentage = Column(Float, nullable=True, name="style_2_percentage")
-    style_3 = Column(String(100), nullable=True, name="style_3")
-    style_3_percentage = Column(Float, nullable=True, name="style_3_percentage")
-    style_4 = Column(String(100), nullable=True, name="style_4")
-    style_4_percentage = Column(Float, nullable=True, name="style_4_percentage")
-    
-    class Config:
-        orm_mode = True
+import asyncio
+import json
+from sqlalchemy import select, insert, delete, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from similarity import StyleSimilarityIndex
+from style_stats import StylePopularity
+from defaults import DEFAULT_PROFILES
+from database import (
+    DB_HOST, DB_USER, DB_NAME, engine, async_engine, AsyncSessionLocal,
+    StylePreferenceModel, StyleNameModel, UserStyleModel, STYLE_COLUMNS, async_style_ids_for
+)
+from fashion_common.cache import TTLCache
+from fashion_common.instrumentation import instrument_fastapi, instrument_engine
+from fashion_common.schema_introspection import SchemaCache
+
+# Style profile cache settings
+STYLE_CACHE_SIZE = int(os.getenv("STYLE_CACHE_SIZE", "10000"))
+STYLE_CACHE_TTL = float(os.getenv("STYLE_CACHE_TTL", "300"))
+
+# Max ids per IN (...) query and rows per executemany batch
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+
+# Export settings for /api/styles/all
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+EXPORT_MAX_PAGE_SIZE = int(os.getenv("EXPORT_MAX_PAGE_SIZE", "10000"))
 
-# Create tables
-metadata = MetaData()
-Base.metadata.create_all(bind=engine)
+# Read users missing from user_styles out of the legacy style_profiles table.
+# Turn off once migrate_styles.py has finished.
+LEGACY_STYLE_FALLBACK = os.getenv("LEGACY_STYLE_FALLBACK", "true").lower() == "true"
+
+# Style popularity: cohort width in user ids, and seconds between reconciling scans
+STATS_COHORT_SIZE = int(os.getenv("STATS_COHORT_SIZE", "10000"))
+STATS_RECONCILE_INTERVAL = float(os.getenv("STATS_RECONCILE_INTERVAL", "600"))
+
+# How long /api/debug/tables serves its cached schema before re-reading it
+SCHEMA_CACHE_TTL = float(os.getenv("SCHEMA_CACHE_TTL", "300"))
 
 # Pydantic models for API
 class StylePreference(BaseModel):
     style_name: str
-    percentage: int
+    # Stored in a SMALLINT column; out-of-range values are rejected with a 422, not a database error
+    percentage: int = Field(ge=0, le=100)
 
 class StyleProfile(BaseModel):
     user_id: int
     preferences: List[StylePreference]
 
+class StyleLookup(BaseModel):
+    user_ids: List[int]
+
+class SimilarLookup(BaseModel):
+    user_ids: List[int]
+    k: int = 10
+
 # Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 # Initialize FastAPI app
 app = FastAPI(title="Style Profile Service")
@@ -75,139 +79,356 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Default style profiles
-DEFAULT_PROFILES = {
-    1: [
-        {"style_name": "Casual", "percentage": 40},
-        {"style_name": "Contemporary", "percentage": 30},
-        {"style_name": "Minimalist", "percentage": 20},
-        {"style_name": "Streetwear", "percentage": 10}
-    ],
-    2: [
-        {"style_name": "Professional", "percentage": 45},
-        {"style_name": "Classic", "percentage": 25},
-        {"style_name": "Formal", "percentage": 20},
-        {"style_name": "Business Casual", "percentage": 10}
-    ],
-    3: [
-        {"style_name": "Streetwear", "percentage": 35},
-        {"style_name": "Urban", "percentage": 30},
-        {"style_name": "Athleisure", "percentage": 20},
-        {"style_name": "Vintage", "percentage": 15}
-    ],
-    "default": [
-        {"style_name": "Casual", "percentage": 35},
-        {"style_name": "Minimalist", "percentage": 25},
-        {"style_name": "Classic", "percentage": 25},
-        {"style_name": "Trendy", "percentage": 15}
-    ]
-}
-
-# Initialize database with default profiles
+# Prometheus /metrics: route latency plus pool and query timings for the styles database.
+# Requests use the async engine; index loads, reconciliation and schema reads use the sync one.
+instrument_fastapi(app)
+instrument_engine(async_engine.sync_engine, "styles")
+instrument_engine(engine, "styles_sync")
+
+# Whole-schema snapshot for the debug view; DDL through the engine refreshes it
+schema_cache = SchemaCache(engine, ttl_seconds=SCHEMA_CACHE_TTL)
+
+# Rendered style lists per user; writes invalidate their user's entry
+style_cache = TTLCache(max_size=STYLE_CACHE_SIZE, ttl_seconds=STYLE_CACHE_TTL)
+
+
+# Every user's style mix as unit vectors, kept current by the write endpoints
+similarity_index = StyleSimilarityIndex(
+    style_names=dict.fromkeys(pref["style_name"] for prefs in DEFAULT_PROFILES.values() for pref in prefs)
+)
+
+# Global and per-cohort style popularity, kept current by the write endpoints
+style_popularity = StylePopularity(cohort_size=STATS_COHORT_SIZE)
+
+def scan_user_styles():
+    # Streams (user_id, style_name, percentage) over a server-side cursor
+    query = (
+        select(UserStyleModel.user_id, StyleNameModel.name, UserStyleModel.percentage)
+        .join(StyleNameModel, StyleNameModel.style_id == UserStyleModel.style_id)
+    )
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE).execute(query)
+        for row in result:
+            yield tuple(row)
+
+def load_indexes():
+    # One streamed pass over user_styles at startup fills both in-memory views;
+    # afterwards writes update them in place
+    rebuild = style_popularity.rebuild()
+    try:
+        similarity_index.load(rebuild.track(scan_user_styles()))
+    except Exception:
+        rebuild.abort()
+        raise
+    rebuild.commit()
+    print(f"Loaded similarity index: {similarity_index.stats()}")
+
+def reconcile_style_popularity() -> int:
+    rebuild = style_popularity.rebuild()
+    try:
+        for row in scan_user_styles():
+            rebuild.add(*row)
+    except Exception:
+        rebuild.abort()
+        raise
+    return rebuild.commit()
+
+async def reconcile_periodically():
+    # Catches writes that bypassed the API (migrations, manual SQL) without any dashboard scanning the table
+    while True:
+        await asyncio.sleep(STATS_RECONCILE_INTERVAL)
+        try:
+            drift = await asyncio.to_thread(reconcile_style_popularity)
+            if drift:
+                print(f"Style popularity reconciled; {drift} styles had drifted")
+        except Exception as e:
+            print(f"Error reconciling style popularity: {e}")
+
+# Readiness for /ready; the process is live as soon as it serves /health
+startup_state = {"ready": False, "import_seconds": time.monotonic() - BOOT_STARTED, "startup_seconds": None, "error": None}
+
+async def warm_up():
+    # Schema and seed data are created by init_db.py, so startup only warms the in-memory index
+    started = time.monotonic()
+    try:
+        # The indexes are filled in one pass over a sync cursor, kept off the event loop
+        await asyncio.to_thread(load_indexes)
+        startup_state["ready"] = True
+    except Exception as e:
+        startup_state["error"] = str(e)
+        print(f"Error loading similarity index: {e}")
+    startup_state["startup_seconds"] = time.monotonic() - BOOT_STARTED
+    print(f"Startup finished in {startup_state['startup_seconds']:.2f}s "
+          f"(imports {startup_state['import_seconds']:.2f}s, warm-up {time.monotonic() - started:.2f}s)")
+
 @app.on_event("startup")
-async def startup_db_client():
-    db = SessionLocal()
+async def start_warm_up():
+    # Runs in the background so liveness checks pass while the index loads
+    app.state.warm_up = asyncio.create_task(warm_up())
+    app.state.reconcile = asyncio.create_task(reconcile_periodically())
+
+@app.get("/health")
+async def health_check():
+    return {"status": "ok"}
+
+@app.get("/ready")
+async def readiness_check():
+    """503 until the similarity index is loaded and the database answers"""
+    if not startup_state["ready"]:
+        return JSONResponse(status_code=503, content={"status": "starting", **startup_state})
     try:
-        # Check if we need to initialize default data
-        result = db.execute(select(StylePreferenceModel).limit(1)).first()
-        if not result:
-            print("Initializing database with default style profiles...")
-            for user_id, preferences in DEFAULT_PROFILES.items():
-                if user_id != "default":  # Skip the default template
-                    for pref in preferences:
-                        db_pref = StylePreferenceModel(
-                            user_id=user_id,
-                            style_1=pref["style_name"],
-                            style_1_percentage=pref["percentage"]
-                        )
-                        db.add(db_pref)
-            db.commit()
-            print("Database initialized successfully!")
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
     except Exception as e:
-        print(f"Error initializing database: {e}")
-    finally:
-        db.close()
+        return JSONResponse(status_code=503, content={"status": "database unavailable", "error": str(e)})
+    return {"status": "ready", **startup_state}
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Style Profile Service is running with MySQL"}
 
-@app.get("/api/users/{user_id}/styles")
-def get_user_style(user_id: int, db: Session = Depends(get_db)):
-    print(f"Getting style profile for user: {user_id}")
-    
-    # Get the single row for this user
-    result = db.execute(text(f"SELECT * FROM style_profiles WHERE user_id = {user_id} LIMIT 1")).fetchone()
-    
-    if not result:
-        print(f"No profile found for user {user_id}")
-        # Return default profile
-        return DEFAULT_PROFILES["default"]
-    
-    print(f"Raw profile data: {result}")
-    
-    # Build the response from all style columns
-    styles = []
-    
-    # Add style_1
-    if result.style_1 and result.style_1_percentage:
-        styles.append({
-            "style_name": result.style_1,
-            "percentage": int(result.style_1_percentage)
-        })
-    
-    # Add style_2
-    if result.style_2 and result.style_2_percentage:
-        styles.append({
-            "style_name": result.style_2,
-            "percentage": int(result.style_2_percentage)
-        })
-    
-    # Add style_3
-    if result.style_3 and result.style_3_percentage:
-        styles.append({
-            "style_name": result.style_3,
-            "percentage": int(result.style_3_percentage)
-        })
-    
-    # Add style_4
-    if result.style_4 and result.style_4_percentage:
-        styles.append({
-            "style_name": result.style_4,
-            "percentage": int(result.style_4_percentage)
-        })
-    
+def chunked(items: list, size: int = BULK_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def render_legacy_styles(rows) -> list:
+    # Build the response from all style columns of a user's legacy rows
+    styles = {}
+    for row in rows:
+        for name_column, percentage_column in STYLE_COLUMNS:
+            style_name = getattr(row, name_column)
+            percentage = getattr(row, percentage_column)
+            if style_name and percentage:
+                styles[style_name] = int(percentage)
+
     # Sort by percentage descending
-    styles.sort(key=lambda x: x["percentage"], reverse=True)
-    
-    print(f"Returning styles: {styles}")
+    return sorted(
+        ({"style_name": name, "percentage": percentage} for name, percentage in styles.items()),
+        key=lambda x: x["percentage"],
+        reverse=True
+    )
+
+async def load_styles(db: AsyncSession, user_ids: List[int]) -> dict:
+    """Read style lists for users that have any, with one indexed query per chunk"""
+    result = {}
+    for ids in chunked(user_ids):
+        rows = await db.execute(
+            select(UserStyleModel.user_id, StyleNameModel.name, UserStyleModel.percentage)
+            .join(StyleNameModel, StyleNameModel.style_id == UserStyleModel.style_id)
+            .where(UserStyleModel.user_id.in_(ids))
+            .order_by(UserStyleModel.user_id, UserStyleModel.percentage.desc())
+        )
+        for row in rows:
+            result.setdefault(row.user_id, []).append({
+                "style_name": row.name,
+                "percentage": row.percentage
+            })
+
+    if LEGACY_STYLE_FALLBACK:
+        unmigrated = [user_id for user_id in user_ids if user_id not in result]
+        for ids in chunked(unmigrated):
+            rows = (await db.execute(
+                select(StylePreferenceModel).where(StylePreferenceModel.user_id.in_(ids))
+            )).scalars()
+            legacy = {}
+            for row in rows:
+                legacy.setdefault(row.user_id, []).append(row)
+            for user_id, user_rows in legacy.items():
+                styles = render_legacy_styles(user_rows)
+                if styles:
+                    result[user_id] = styles
+    return result
+
+@app.get("/api/users/{user_id}/styles")
+async def get_user_style(user_id: int, db: AsyncSession = Depends(get_db)):
+    cached = style_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    # Taken before reading, so a write that lands meanwhile keeps this result out of the cache
+    token = style_cache.token()
+    # Fall back to the default profile for users without any styles
+    styles = (await load_styles(db, [user_id])).get(user_id, DEFAULT_PROFILES["default"])
+
+    style_cache.set(user_id, styles, token)
     return styles
 
+async def replace_preferences(db: AsyncSession, profiles: List[StyleProfile]):
+    # Resolve names before writing anything; new names are committed separately
+    style_ids = await async_style_ids_for(db, (
+        pref.style_name for profile in profiles for pref in profile.preferences
+    ))
+
+    # Delete and re-insert in batches; the caller owns the transaction
+    user_ids = [profile.user_id for profile in profiles]
+    for ids in chunked(user_ids):
+        await db.execute(delete(UserStyleModel).where(UserStyleModel.user_id.in_(ids)))
+        if LEGACY_STYLE_FALLBACK:
+            # A written profile supersedes the legacy one; left in place, it would resurface through
+            # the read fallback once the user clears their styles, and migrate_styles.py would copy it back
+            await db.execute(delete(StylePreferenceModel).where(StylePreferenceModel.user_id.in_(ids)))
+
+    rows = {}
+    for profile in profiles:
+        for pref in profile.preferences:
+            # A style listed twice for one user keeps its last percentage
+            key = (profile.user_id, style_ids[pref.style_name])
+            rows[key] = {"user_id": key[0], "style_id": key[1], "percentage": pref.percentage}
+    for batch in chunked(list(rows.values())):
+        await db.execute(insert(UserStyleModel), batch)
+
+@app.post("/api/styles/lookup")
+async def get_user_styles_bulk(lookup: StyleLookup, db: AsyncSession = Depends(get_db)):
+    """Resolve style profiles for many users at once, keyed by user id"""
+    result = {}
+    missing = []
+    for user_id in dict.fromkeys(lookup.user_ids):
+        cached = style_cache.get(user_id)
+        if cached is not None:
+            result[user_id] = cached
+        else:
+            missing.append(user_id)
+
+    token = style_cache.token()
+    loaded = await load_styles(db, missing)
+    for user_id in missing:
+        result[user_id] = loaded.get(user_id, DEFAULT_PROFILES["default"])
+        style_cache.set(user_id, result[user_id], token)
+
+    return result
+
+@app.post("/api/styles/bulk")
+async def update_user_styles_bulk(profiles: List[StyleProfile], db: AsyncSession = Depends(get_db)):
+    """Replace style preferences for many users in one transaction"""
+    # A user listed twice keeps only their last profile, in the database and in memory alike
+    profiles = list({profile.user_id: profile for profile in profiles}.values())
+    try:
+        await replace_preferences(db, profiles)
+        await db.commit()
+        for profile in profiles:
+            style_cache.invalidate(profile.user_id)
+            preferences = [pref.model_dump() for pref in profile.preferences]
+            similarity_index.update(profile.user_id, preferences)
+            style_popularity.update(profile.user_id, preferences)
+        return {"message": "Style preferences updated successfully", "updated": len(profiles)}
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to update style preferences: {str(e)}")
+
 @app.post("/api/users/{user_id}/styles")
-def update_user_style(user_id: int, preferences: List[StylePreference], db: Session = Depends(get_db)):
+async def update_user_style(user_id: int, preferences: List[StylePreference], db: AsyncSession = Depends(get_db)):
     try:
-        # Delete existing preferences for this user
-        db.execute(delete(StylePreferenceModel).where(StylePreferenceModel.user_id == user_id))
-        
-        # Add new preferences
-        for pref in preferences:
-            db_pref = StylePreferenceModel(
-                user_id=user_id,
-                style_1=pref.style_name,
-                style_1_percentage=pref.percentage
-            )
-            db.add(db_pref)
-        
-        db.commit()
+        # Replace existing preferences for this user
+        await replace_preferences(db, [StyleProfile(user_id=user_id, preferences=preferences)])
+        await db.commit()
+        style_cache.invalidate(user_id)
+        similarity_index.update(user_id, [pref.model_dump() for pref in preferences])
+        style_popularity.update(user_id, [pref.model_dump() for pref in preferences])
         return {"message": "Style preferences updated successfully"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to update style preferences: {str(e)}")
 
+async def similar_users(db: AsyncSession, user_ids: List[int], k: int) -> dict:
+    queries = {}
+    unindexed = []
+    for user_id in dict.fromkeys(user_ids):
+        vector = similarity_index.user_vector(user_id)
+        if vector is None:
+            unindexed.append(user_id)
+        else:
+            queries[user_id] = vector
+    # Users without indexed styles are matched on their (possibly default) profile
+    loaded = await load_styles(db, unindexed)
+    for user_id in unindexed:
+        queries[user_id] = similarity_index.vector(loaded.get(user_id, DEFAULT_PROFILES["default"]))
+    return similarity_index.similar(queries, k)
+
+@app.get("/api/users/{user_id}/similar")
+async def get_similar_users(user_id: int, k: int = Query(10, ge=1, le=100), db: AsyncSession = Depends(get_db)):
+    """Users whose style mix is closest to this user's (cosine similarity)"""
+    return (await similar_users(db, [user_id], k))[user_id]
+
+@app.post("/api/users/similar")
+async def get_similar_users_bulk(lookup: SimilarLookup, db: AsyncSession = Depends(get_db)):
+    """Similar users for many users at once, keyed by user id"""
+    if not 1 <= lookup.k <= 100:
+        raise HTTPException(status_code=400, detail="k must be between 1 and 100")
+    return await similar_users(db, lookup.user_ids, lookup.k)
+
+@app.get("/api/styles/stats")
+async def get_style_stats(cohort: Optional[int] = None, top: int = Query(10, ge=1, le=100)):
+    """Style popularity (users, share, mean percentage, top styles), globally or for one cohort.
+
+    Served from in-memory aggregates; no query runs against user_styles.
+    """
+    return style_popularity.stats(cohort, top)
+
+@app.get("/api/styles/stats/cohorts")
+async def get_style_stats_cohorts():
+    """Cohorts (user-id ranges) with their user counts"""
+    return style_popularity.cohorts()
+
+@app.get("/api/similarity/stats")
+async def get_similarity_stats():
+    """Size of the in-memory similarity matrix"""
+    return similarity_index.stats()
+
+# Columns read by the export; avoids hydrating full ORM objects
+EXPORT_QUERY = (
+    select(UserStyleModel.user_id, UserStyleModel.style_id, StyleNameModel.name, UserStyleModel.percentage)
+    .join(StyleNameModel, StyleNameModel.style_id == UserStyleModel.style_id)
+    .order_by(UserStyleModel.user_id, UserStyleModel.style_id)
+)
+
+def export_query(after: Optional[str] = None):
+    # The cursor is the "user_id:style_id" primary key of the last row seen
+    if not after:
+        return EXPORT_QUERY
+    try:
+        user_id, style_id = (int(part) for part in after.split(":"))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="after must look like '<user_id>:<style_id>'")
+    return EXPORT_QUERY.where(tuple_(UserStyleModel.user_id, UserStyleModel.style_id) > tuple_(user_id, style_id))
+
+def export_row(row) -> dict:
+    return {
+        "user_id": row.user_id,
+        "style_name": row.name,
+        "percentage": row.percentage
+    }
+
+async def stream_style_rows(query):
+    # Uses its own connection so the cursor outlives the request's session
+    async with async_engine.connect() as conn:
+        result = await conn.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for row in result:
+            yield json.dumps(export_row(row)) + "\n"
+
 @app.get("/api/styles/all")
-def get_all_styles(db: Session = Depends(get_db)):
-    """Get all style preferences for admin purposes"""
-    preferences = db.execute(select(StylePreferenceModel)).all()
+async def get_all_styles(
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=EXPORT_MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get all style preferences for admin purposes
+
+    format=ndjson streams one row per line from a server-side cursor.
+    Passing limit (and after, the next_after of the previous page) returns one keyset page.
+    """
+    query = export_query(after)
+    if format == "ndjson":
+        return StreamingResponse(stream_style_rows(query), media_type="application/x-ndjson")
+
+    if limit is not None:
+        rows = (await db.execute(query.limit(limit))).all()
+        return {
+            "items": [export_row(row) for row in rows],
+            "next_after": f"{rows[-1].user_id}:{rows[-1].style_id}" if len(rows) == limit else None
+        }
+
+    preferences = (await db.execute(query)).all()
     
     # Group by user_id
     result = {}
@@ -216,92 +437,93 @@ def get_all_styles(db: Session = Depends(get_db)):
             result[pref.user_id] = []
         
         result[pref.user_id].append({
-            "style_name": pref.style_1,
-            "percentage": pref.style_1_percentage
+            "style_name": pref.name,
+            "percentage": pref.percentage
         })
     
     return result
 
 @app.get("/api/test/update/{user_id}/{style_name}/{percentage}")
-def test_update_style(user_id: int, style_name: str, percentage: int, db: Session = Depends(get_db)):
+async def test_update_style(user_id: int, style_name: str, percentage: int = Path(ge=0, le=100), db: AsyncSession = Depends(get_db)):
     """Test endpoint to update a specific style preference"""
     try:
-        # Get the user's profile
-        result = db.execute(text(f"SELECT * FROM style_profiles WHERE user_id = {user_id} LIMIT 1")).fetchone()
-        
-        if not result:
+        # Resolve the user the way reads do, so legacy-only users are found while the fallback is on
+        current = (await load_styles(db, [user_id])).get(user_id)
+
+        if not current:
             print(f"No profile found for user {user_id}")
             return {"error": "User profile not found"}
-        
-        # Find which style column has this style name
-        style_column = None
-        if result.style_1 == style_name:
-            style_column = "style_1_percentage"
-        elif result.style_2 == style_name:
-            style_column = "style_2_percentage"
-        elif result.style_3 == style_name:
-            style_column = "style_3_percentage"
-        elif result.style_4 == style_name:
-            style_column = "style_4_percentage"
-        
-        if style_column:
-            # Update the percentage for this style
-            db.execute(text(f"UPDATE style_profiles SET {style_column} = {percentage} WHERE user_id = {user_id}"))
-            db.commit()
-            return get_user_style(user_id, db)
-        else:
+
+        if not any(style["style_name"] == style_name for style in current):
             return {"error": f"Style '{style_name}' not found for user {user_id}"}
+
+        # Rewrite the whole profile; a legacy-only user is moved into user_styles on the way
+        preferences = [
+            StylePreference(
+                style_name=style["style_name"],
+                percentage=percentage if style["style_name"] == style_name else style["percentage"],
+            )
+            for style in current
+        ]
+        await replace_preferences(db, [StyleProfile(user_id=user_id, preferences=preferences)])
+        await db.commit()
+        style_cache.invalidate(user_id)
+        styles = await get_user_style(user_id, db)
+        similarity_index.update(user_id, styles)
+        style_popularity.update(user_id, styles)
+        return styles
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         print(f"Error updating style: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to update style preference: {str(e)}")
 
 @app.get("/api/debug/raw-profile/{user_id}")
-def get_raw_profile(user_id: int, db: Session = Depends(get_db)):
+async def get_raw_profile(user_id: int, db: AsyncSession = Depends(get_db)):
     """Debug endpoint to see raw database data"""
     try:
-        # Execute raw SQL query using SQLAlchemy's text function
-        result = db.execute(text(f"SELECT * FROM style_profiles WHERE user_id = {user_id}")).fetchall()
+        result = (await db.execute(
+            select(UserStyleModel.user_id, UserStyleModel.style_id, StyleNameModel.name, UserStyleModel.percentage)
+            .join(StyleNameModel, StyleNameModel.style_id == UserStyleModel.style_id)
+            .where(UserStyleModel.user_id == user_id)
+        )).fetchall()
+        legacy = (await db.execute(
+            text("SELECT * FROM style_profiles WHERE user_id = :user_id"),
+            {"user_id": user_id}
+        )).fetchall()
         
         # Convert to dict for JSON response
-        if result:
-            columns = result[0]._mapping.keys()
-            data = [{col: getattr(row, col) for col in columns} for row in result]
-            return {"raw_data": data}
+        if result or legacy:
+            return {
+                "raw_data": [dict(row._mapping) for row in result],
+                "legacy_data": [dict(row._mapping) for row in legacy]
+            }
         return {"message": "No data found"}
     except Exception as e:
         return {"error": str(e)}
 
 @app.get("/api/debug/tables")
-def get_tables(db: Session = Depends(get_db)):
+async def get_tables(refresh: bool = False):
     """Debug endpoint to see all tables in the database"""
     try:
-        # Get all table names
-        result = db.execute(text("SHOW TABLES")).fetchall()
-        tables = [row[0] for row in result]
-        
-        # For each table, get its structure
-        table_info = {}
-        for table in tables:
-            columns = db.execute(text(f"DESCRIBE {table}")).fetchall()
-            table_info[table] = [
-                {
-                    "Field": col[0],
-                    "Type": col[1],
-                    "Null": col[2],
-                    "Key": col[3],
-                    "Default": col[4],
-                    "Extra": col[5]
-                }
-                for col in columns
-            ]
-        
-        return {"tables": tables, "structure": table_info}
+        if refresh:
+            schema_cache.invalidate()
+        # One information_schema query on a miss, run off the event loop
+        snapshot = schema_cache.cached() or await asyncio.to_thread(schema_cache.snapshot)
+        return {
+            "tables": list(snapshot["tables"]),
+            "structure": snapshot["tables"],
+            "version": snapshot["version"]
+        }
     except Exception as e:
         return {"error": str(e)}
 
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Hit-rate stats for the style profile cache"""
+    return style_cache.stats()
+
 @app.get("/api/debug/connection")
-def get_connection_info():
+async def get_connection_info():
     """Debug endpoint to see database connection info"""
     return {
         "database": {
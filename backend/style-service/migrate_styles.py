@@ -0,0 +1,129 @@
+"""Copy legacy style_profiles rows into the normalized user_styles layout.
+
+Runs online next to the service: users are converted in small keyset batches,
+each in its own transaction, and users that already have user_styles rows
+(because they were written through the API since the deploy) are left alone.
+
+    python migrate_styles.py --batch-size 500 --pause 0.05
+"""
+import argparse
+import time
+from sqlalchemy import select, insert, inspect, text
+from database import (
+    engine, SessionLocal, Base, StylePreferenceModel, UserStyleModel, STYLE_COLUMNS, style_ids_for
+)
+
+LEGACY_USER_INDEX = "ix_style_profiles_user_id"
+
+def ensure_legacy_index():
+    # Batches walk style_profiles by user_id, which has no index in the legacy schema
+    indexes = inspect(engine).get_indexes(StylePreferenceModel.__tablename__)
+    if any(index["column_names"] == ["user_id"] for index in indexes):
+        return
+    print(f"Creating {LEGACY_USER_INDEX} on style_profiles(user_id)...")
+    ddl = f"CREATE INDEX {LEGACY_USER_INDEX} ON style_profiles (user_id)"
+    if engine.dialect.name == "mysql":
+        # Build the index without blocking reads and writes on the table
+        ddl += " ALGORITHM=INPLACE LOCK=NONE"
+    with engine.begin() as conn:
+        conn.execute(text(ddl))
+
+def legacy_preferences(rows) -> dict:
+    # Flatten every style column of every row; later rows win on duplicate names
+    styles = {}
+    for row in rows:
+        for name_column, percentage_column in STYLE_COLUMNS:
+            style_name = getattr(row, name_column)
+            percentage = getattr(row, percentage_column)
+            if style_name and percentage:
+                styles[style_name] = int(percentage)
+    return styles
+
+def migrate_batch(db, user_ids: list, dry_run: bool) -> int:
+    # Locking read: holds off API writes for these users until this batch commits
+    already_migrated = set(db.execute(
+        select(UserStyleModel.user_id)
+        .where(UserStyleModel.user_id.in_(user_ids))
+        .with_for_update()
+    ).scalars())
+    pending = [user_id for user_id in user_ids if user_id not in already_migrated]
+    if not pending:
+        return 0
+
+    # Also locking: an API write deleting these legacy rows waits, or has already removed them
+    legacy = {}
+    legacy_rows = db.execute(
+        select(StylePreferenceModel).where(StylePreferenceModel.user_id.in_(pending)).with_for_update()
+    ).scalars()
+    for row in legacy_rows:
+        legacy.setdefault(row.user_id, []).append(row)
+    preferences = {user_id: legacy_preferences(rows) for user_id, rows in legacy.items()}
+
+    if dry_run:
+        return len(preferences)
+
+    style_ids = style_ids_for(db, (name for styles in preferences.values() for name in styles))
+    rows = [
+        {"user_id": user_id, "style_id": style_ids[name], "percentage": percentage}
+        for user_id, styles in preferences.items()
+        for name, percentage in styles.items()
+    ]
+    if rows:
+        db.execute(
+            insert(UserStyleModel).prefix_with("IGNORE", dialect="mysql").prefix_with("OR IGNORE", dialect="sqlite"),
+            rows
+        )
+    return len(preferences)
+
+def migrate(batch_size: int, pause: float, dry_run: bool):
+    Base.metadata.create_all(bind=engine)
+    ensure_legacy_index()
+
+    started = time.monotonic()
+    last_user_id = None
+    users = 0
+    migrated = 0
+    while True:
+        db = SessionLocal()
+        try:
+            query = (
+                select(StylePreferenceModel.user_id)
+                .distinct()
+                .order_by(StylePreferenceModel.user_id)
+                .limit(batch_size)
+            )
+            if last_user_id is not None:
+                query = query.where(StylePreferenceModel.user_id > last_user_id)
+            user_ids = list(db.execute(query).scalars())
+            if not user_ids:
+                break
+
+            migrated += migrate_batch(db, user_ids, dry_run)
+            if dry_run:
+                db.rollback()
+            else:
+                db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        users += len(user_ids)
+        last_user_id = user_ids[-1]
+        elapsed = time.monotonic() - started
+        print(f"Scanned {users} users, migrated {migrated} (last user_id {last_user_id}, {users / elapsed:.0f} users/s)")
+        if pause:
+            # Leaves room for production traffic between batches
+            time.sleep(pause)
+
+    action = "Would migrate" if dry_run else "Migrated"
+    print(f"{action} {migrated} of {users} legacy users in {time.monotonic() - started:.1f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate style_profiles into user_styles")
+    parser.add_argument("--batch-size", type=int, default=500, help="users per transaction")
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between batches")
+    parser.add_argument("--dry-run", action="store_true", help="scan and count without writing")
+    args = parser.parse_args()
+    migrate(args.batch_size, args.pause, args.dry_run)
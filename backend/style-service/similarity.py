@@ -0,0 +1,197 @@
+import threading
+import numpy as np
+
+
+class StyleSimilarityIndex:
+    """In-memory user x style matrix of L2-normalized style percentages.
+
+    Rows are unit vectors, so cosine similarity is a plain dot product and
+    top-k for one or many users is a single matrix multiply.
+
+    The lock is only ever held for short, bounded work: load() builds a new
+    matrix without it and swaps it in at the end, so handlers calling update()
+    or similar() from the event loop never wait on a table scan.
+    """
+
+    def __init__(self, style_names=(), initial_users: int = 1024, column_source=None):
+        self._lock = threading.RLock()
+        # Set on a matrix being built by load(): style columns are assigned by the live
+        # index, so vectors built against either one line up after the swap
+        self._column_source = column_source
+        # Writes made while load() is scanning, replayed onto the new matrix before the swap
+        self._loading = None
+        self.style_index = {}
+        self.user_index = {}
+        self.user_ids = np.zeros(initial_users, dtype=np.int64)
+        self.matrix = np.zeros((initial_users, max(len(style_names), 1)), dtype=np.float32)
+        self.user_count = 0
+        for name in style_names:
+            self._style_column(name)
+
+    def _style_column(self, name: str) -> int:
+        column = self.style_index.get(name)
+        if column is None:
+            if self._column_source is not None:
+                column = self._column_source.style_column(name)
+            else:
+                column = len(self.style_index)
+            self.style_index[name] = column
+            self._ensure_width(column + 1)
+        return column
+
+    def _ensure_width(self, width: int):
+        if width > self.matrix.shape[1]:
+            # Grow columns geometrically; new styles are rare
+            grown = np.zeros((self.matrix.shape[0], max(width, self.matrix.shape[1] * 2)), dtype=np.float32)
+            grown[:, :self.matrix.shape[1]] = self.matrix
+            self.matrix = grown
+
+    def style_column(self, name: str) -> int:
+        with self._lock:
+            return self._style_column(name)
+
+    def _user_row(self, user_id: int) -> int:
+        row = self.user_index.get(user_id)
+        if row is None:
+            row = self.user_count
+            if row >= self.matrix.shape[0]:
+                capacity = self.matrix.shape[0] * 2
+                grown = np.zeros((capacity, self.matrix.shape[1]), dtype=np.float32)
+                grown[:row] = self.matrix[:row]
+                self.matrix = grown
+                grown_ids = np.zeros(capacity, dtype=np.int64)
+                grown_ids[:row] = self.user_ids[:row]
+                self.user_ids = grown_ids
+            self.user_index[user_id] = row
+            self.user_ids[row] = user_id
+            self.user_count += 1
+        return row
+
+    def vector(self, preferences) -> np.ndarray:
+        # preferences: iterable of {"style_name", "percentage"}; unknown styles add columns
+        with self._lock:
+            vector = np.zeros(self.matrix.shape[1], dtype=np.float32)
+            for pref in preferences:
+                column = self._style_column(pref["style_name"])
+                if column >= vector.shape[0]:
+                    vector = np.pad(vector, (0, self.matrix.shape[1] - vector.shape[0]))
+                vector[column] = pref["percentage"]
+            norm = np.linalg.norm(vector)
+            return vector / norm if norm else vector
+
+    def update(self, user_id: int, preferences):
+        preferences = list(preferences)
+        with self._lock:
+            if self._loading is not None:
+                self._loading[user_id] = preferences
+            vector = self.vector(preferences)
+            row = self._user_row(user_id)
+            self.matrix[row, :vector.shape[0]] = vector
+            self.matrix[row, vector.shape[0]:] = 0
+
+    def load(self, rows, chunk_size: int = 10000):
+        """Replace the matrix with (user_id, style_name, percentage) rows, e.g. a streamed query.
+
+        The scan fills a separate matrix without holding the lock; writes that
+        land meanwhile are replayed onto it before it is swapped in.
+        """
+        with self._lock:
+            if self._loading is not None:
+                raise RuntimeError("A load is already running")
+            self._loading = {}
+            fresh = StyleSimilarityIndex(initial_users=self.matrix.shape[0], column_source=self)
+        try:
+            fresh._fill(rows, chunk_size)
+        except Exception:
+            with self._lock:
+                self._loading = None
+            raise
+        with self._lock:
+            for user_id, preferences in self._loading.items():
+                fresh.update(user_id, preferences)
+            self._loading = None
+            # Styles first seen by queries during the scan have columns here but not in fresh
+            fresh._ensure_width(len(self.style_index))
+            self.matrix = fresh.matrix
+            self.user_ids = fresh.user_ids
+            self.user_index = fresh.user_index
+            self.user_count = fresh.user_count
+
+    def _fill(self, rows, chunk_size: int):
+        touched = set()
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                touched.update(self._load_chunk(chunk))
+                chunk = []
+        if chunk:
+            touched.update(self._load_chunk(chunk))
+        if touched:
+            touched = np.fromiter(touched, dtype=np.int64, count=len(touched))
+            norms = np.linalg.norm(self.matrix[touched], axis=1, keepdims=True)
+            norms[norms == 0] = 1
+            self.matrix[touched] /= norms
+
+    def _load_chunk(self, rows) -> list:
+        for user_id, style_name, _ in rows:
+            self._style_column(style_name)
+            self._user_row(user_id)
+        user_rows = np.fromiter((self.user_index[r[0]] for r in rows), dtype=np.int64, count=len(rows))
+        columns = np.fromiter((self.style_index[r[1]] for r in rows), dtype=np.int64, count=len(rows))
+        values = np.fromiter((r[2] for r in rows), dtype=np.float32, count=len(rows))
+        self.matrix[user_rows, columns] = values
+        return np.unique(user_rows).tolist()
+
+    def user_vector(self, user_id: int):
+        with self._lock:
+            row = self.user_index.get(user_id)
+            return None if row is None else self.matrix[row].copy()
+
+    def similar(self, queries: dict, k: int = 10) -> dict:
+        """Top-k most similar users for each query, batched into one matrix multiply.
+
+        queries maps a user id to that user's unit style vector (see vector()).
+        """
+        with self._lock:
+            if not queries or self.user_count == 0:
+                return {user_id: [] for user_id in queries}
+            users = self.matrix[:self.user_count]
+            width = users.shape[1]
+            query_ids = list(queries)
+            query_matrix = np.zeros((len(query_ids), width), dtype=np.float32)
+            for i, user_id in enumerate(query_ids):
+                vector = queries[user_id][:width]
+                query_matrix[i, :vector.shape[0]] = vector
+
+            scores = query_matrix @ users.T
+            # A user is never their own neighbour
+            for i, user_id in enumerate(query_ids):
+                row = self.user_index.get(user_id)
+                if row is not None:
+                    scores[i, row] = -np.inf
+
+            count = min(k, self.user_count)
+            top = np.argpartition(-scores, count - 1, axis=1)[:, :count]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+            result = {}
+            for i, user_id in enumerate(query_ids):
+                result[user_id] = [
+                    {"user_id": int(self.user_ids[row]), "score": round(float(score), 4)}
+                    for row, score in zip(top[i], top_scores[i])
+                    if np.isfinite(score) and score > 0
+                ]
+            return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "users": self.user_count,
+                "styles": len(self.style_index),
+                "capacity": int(self.matrix.shape[0]),
+                "matrix_bytes": int(self.matrix.nbytes),
+            }
@@ -0,0 +1,175 @@
+import threading
+import time
+
+
+class Aggregate:
+    """Style popularity for one scope: users holding each style and their summed percentages"""
+
+    __slots__ = ("users", "counts", "sums")
+
+    def __init__(self):
+        self.users = 0
+        self.counts = {}
+        self.sums = {}
+
+    def add(self, preferences: dict, sign: int = 1):
+        self.users += sign
+        for name, percentage in preferences.items():
+            count = self.counts.get(name, 0) + sign
+            if count:
+                self.counts[name] = count
+                self.sums[name] = self.sums.get(name, 0) + sign * percentage
+            else:
+                self.counts.pop(name, None)
+                self.sums.pop(name, None)
+
+    def render(self) -> dict:
+        styles = {
+            name: {
+                "users": count,
+                "share": round(count / self.users, 4) if self.users else 0.0,
+                "mean_percentage": round(self.sums[name] / count, 2),
+            }
+            for name, count in self.counts.items()
+        }
+        ranked = sorted(styles.items(), key=lambda item: (-item[1]["users"], -item[1]["mean_percentage"], item[0]))
+        return {
+            "users": self.users,
+            "styles": styles,
+            "top": [{"style_name": name, **stats} for name, stats in ranked],
+        }
+
+
+class StylePopularity:
+    """Global and per-cohort style popularity, updated in place on every write.
+
+    Each user's current preferences are kept so a write can subtract the old
+    mix and add the new one. Cohorts are user-id ranges of cohort_size, which
+    track signup order. rebuild() recomputes everything from a table scan and
+    replays writes that landed while the scan was running.
+
+    The aggregates live in one process: with several replicas, each sees only
+    its own writes until its next rebuild picks up the rest from the table.
+    """
+
+    def __init__(self, cohort_size: int = 10000):
+        self.cohort_size = cohort_size
+        self._lock = threading.Lock()
+        self._user_prefs = {}
+        self._global = Aggregate()
+        self._cohorts = {}
+        self._rendered = {}
+        self._rebuilds = []
+        self.version = 0
+        self.reconciled_at = None
+        self.last_drift = None
+
+    def cohort_of(self, user_id: int) -> int:
+        return user_id // self.cohort_size
+
+    def _apply(self, user_id: int, preferences: dict):
+        old = self._user_prefs.get(user_id)
+        cohort = self._cohorts.setdefault(self.cohort_of(user_id), Aggregate())
+        if old is not None:
+            self._global.add(old, -1)
+            cohort.add(old, -1)
+        if preferences:
+            self._user_prefs[user_id] = preferences
+            self._global.add(preferences)
+            cohort.add(preferences)
+        else:
+            self._user_prefs.pop(user_id, None)
+
+    def update(self, user_id: int, preferences):
+        """Replace a user's styles; preferences is a list of {"style_name", "percentage"}"""
+        mix = {pref["style_name"]: pref["percentage"] for pref in preferences}
+        with self._lock:
+            self._apply(user_id, mix)
+            for rebuild in self._rebuilds:
+                rebuild.touched[user_id] = mix
+            self._rendered.clear()
+            self.version += 1
+
+    def stats(self, cohort: int = None, top: int = 10) -> dict:
+        with self._lock:
+            rendered = self._rendered.get(cohort)
+            if rendered is None:
+                # Rendered once per scope and version, with the full ranking; reads only slice it
+                aggregate = self._global if cohort is None else self._cohorts.get(cohort)
+                rendered = {
+                    "scope": "global" if cohort is None else f"cohort:{cohort}",
+                    **(aggregate or Aggregate()).render(),
+                    "version": self.version,
+                    "reconciled_at": self.reconciled_at,
+                }
+                # Only scopes that exist are kept, so arbitrary ?cohort= values can't grow the cache
+                if cohort is None or aggregate is not None:
+                    self._rendered[cohort] = rendered
+        return {**rendered, "top": rendered["top"][:top]}
+
+    def cohorts(self) -> dict:
+        with self._lock:
+            return {
+                "cohort_size": self.cohort_size,
+                "cohorts": [
+                    {"cohort": cohort, "first_user_id": cohort * self.cohort_size, "users": aggregate.users}
+                    for cohort, aggregate in sorted(self._cohorts.items())
+                    if aggregate.users
+                ],
+            }
+
+    def rebuild(self) -> "Rebuild":
+        rebuild = Rebuild(self)
+        with self._lock:
+            self._rebuilds.append(rebuild)
+        return rebuild
+
+    def _swap(self, rebuild: "Rebuild") -> int:
+        # The bulk of the rebuild happens outside the lock so writes aren't held up
+        fresh = StylePopularity(self.cohort_size)
+        for user_id, mix in rebuild.user_prefs.items():
+            fresh._apply(user_id, mix)
+        with self._lock:
+            self._rebuilds.remove(rebuild)
+            # Writes committed during the scan may or may not be in it; their latest value wins
+            for user_id, mix in rebuild.touched.items():
+                fresh._apply(user_id, mix)
+            old, new = self._global, fresh._global
+            drift = sum(
+                1 for name in old.counts.keys() | new.counts.keys()
+                if old.counts.get(name) != new.counts.get(name) or old.sums.get(name) != new.sums.get(name)
+            )
+            self._user_prefs = fresh._user_prefs
+            self._global = fresh._global
+            self._cohorts = fresh._cohorts
+            self._rendered.clear()
+            self.version += 1
+            self.reconciled_at = time.time()
+            self.last_drift = drift
+            return drift
+
+
+class Rebuild:
+    """Collects (user_id, style_name, percentage) rows from a scan, then replaces the live aggregates"""
+
+    def __init__(self, popularity: StylePopularity):
+        self.popularity = popularity
+        self.user_prefs = {}
+        self.touched = {}
+
+    def add(self, user_id: int, style_name: str, percentage: int):
+        self.user_prefs.setdefault(user_id, {})[style_name] = percentage
+
+    def track(self, rows):
+        # Pass rows through unchanged, so one scan can feed another consumer too
+        for row in rows:
+            self.add(*row)
+            yield row
+
+    def commit(self) -> int:
+        """Swap in the rebuilt aggregates; returns how many styles had drifted from the live counts"""
+        return self.popularity._swap(self)
+
+    def abort(self):
+        with self.popularity._lock:
+            self.popularity._rebuilds.remove(self)
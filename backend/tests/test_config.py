@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+
+
+def run_app_import(tmp_path, env_file_lines):
+    env_file = tmp_path / ".env"
+    env_file.write_text("\n".join(env_file_lines) + "\n")
+    env = {key: value for key, value in os.environ.items() if key != "SECRET_KEY"}
+    env.update({
+        "ENV_FILE": str(env_file),
+        "PYTHONPATH": REPO_DIR,
+        "DATABASE_URL": f"sqlite:///{tmp_path / 'app.db'}",
+        "UPLOAD_FOLDER": str(tmp_path / "uploads"),
+        "REQUEST_LOG_ENABLED": "false",
+    })
+    return subprocess.run(
+        [sys.executable, "-c", "import app; print(app.app.config['SECRET_KEY'])"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+
+
+def test_secret_key_is_read_from_env_file(tmp_path):
+    result = run_app_import(tmp_path, ["SECRET_KEY=from-dotenv-3f9a"])
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().endswith("from-dotenv-3f9a")
+
+
+def test_app_refuses_to_start_without_secret_key(tmp_path):
+    result = run_app_import(tmp_path, [])
+    assert result.returncode != 0
+    assert "SECRET_KEY must be set" in result.stderr
@@ -2,10 +2,8 @@ import { create, StateCreator } from 'zustand';
 import { images } from '@/lib/api';
 
 interface ImageAnalysis {
-  clothingType: string;
   colors: string[];
   patterns: string;
-  style: string;
 }
 
 interface UploadedImage {
@@ -1,4 +1,4 @@
-const { spawn } = require('child_process');
+const { spawn, spawnSync } = require('child_process');
 const path = require('path');
 
 // Start the main backend
@@ -8,6 +8,13 @@ const mainBackend = spawn('node', ['src/server.js'], {
   shell: true
 });
 
+// Create the style service schema and seed data once, before the service starts
+spawnSync('python', ['init_db.py'], {
+  cwd: path.join(__dirname, 'backend/style-service'),
+  stdio: 'inherit',
+  shell: true
+});
+
 // Start the style service
 const styleService = spawn('python', ['main.py'], {
   cwd: path.join(__dirname, 'backend/style-service'),